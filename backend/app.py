@@ -1,6 +1,25 @@
+import base64
+import hmac
+import json
+import os
 import time
-
-from flask import Flask, jsonify, request
+from datetime import datetime, timedelta, timezone
+from collections import Counter
+from itertools import takewhile
+from queue import Empty
+
+from flask import (
+    Flask,
+    Response,
+    abort,
+    current_app,
+    g,
+    has_app_context,
+    jsonify,
+    make_response,
+    request,
+    send_file,
+)
 from flask_cors import CORS
 from flask_jwt_extended import (
     JWTManager,
@@ -10,45 +29,467 @@ from flask_jwt_extended import (
     jwt_required,
 )
 from werkzeug.security import check_password_hash, generate_password_hash
-from sqlalchemy import or_, text
-
-from matching import haversine_km, match_score
-from models import Application, Feedback, Job, Provider, SearchLog, Seeker, User, Notification, NotificationPreference, db
+from sqlalchemy import event, func, or_, text, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm.attributes import get_history
+
+from matching import (
+    SkillIndex,
+    format_skill_ids,
+    haversine_km,
+    match_score,
+    match_scores_batch,
+    skill_map,
+    unique_skills,
+)
+from models import (
+    Application,
+    Feedback,
+    Job,
+    Notification,
+    NotificationOutbox,
+    NotificationPreference,
+    Provider,
+    SearchLog,
+    Seeker,
+    SeekerJobMatch,
+    Skill,
+    User,
+    db,
+)
+from spatial import JobGrid, bounding_box
+from match_cache import MatchCache
+from search import ensure_job_fts, fts_query, job_fts_matches
+from notification_stream import NotificationBroker, sse_event
+from outbox import OutboxDispatcher
+from retention import RetentionManager, RetentionPolicy, enable_incremental_vacuum
+from search_log import SearchLogBuffer
+from rollups import BUCKETS, DAY, HOUR, MetricsRollup, bucket_start
+from telemetry import Telemetry
+from profiling import KINDS as PROFILE_KINDS, Profiler
 from notifications import (
+    DIGEST_TYPES,
     init_mail,
-    send_email,
-    send_sms,
     format_sms_for_rural,
     get_match_notification,
     get_application_update_notification,
     get_interview_notification,
     get_deadline_notification,
     get_new_job_notification,
+    normalize_phone,
+    sms_rate_budget,
 )
 
 
-def create_app():
+# db.session events fire for every app sharing the extension, so they are
+# registered once here and routed to the hooks of the app in context
+SESSION_EVENTS = ("after_flush", "after_flush_postexec", "after_commit", "after_rollback")
+
+
+def _session_event_dispatcher(name):
+    def dispatch(*args):
+        if not has_app_context():
+            return
+        for hook in current_app.extensions.get("jobmatch_session_hooks", {}).get(name, ()):
+            hook(*args)
+
+    return dispatch
+
+
+for _event_name in SESSION_EVENTS:
+    event.listen(db.session, _event_name, _session_event_dispatcher(_event_name))
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _env_float(name, default):
+    return float(os.getenv(name, default))
+
+
+def _env_list(name, default):
+    """Comma separated setting; unset means default"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+def _env_weights(name, default):
+    """Setting of the form urgent=8,high=4,... merged over default"""
+    weights = dict(default)
+    for item in _env_list(name, ()):
+        key, _, value = item.partition("=")
+        weights[key.strip()] = int(value)
+    return weights
+
+
+def create_app(config=None):
     app = Flask(__name__)
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///database.db"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["JWT_SECRET_KEY"] = app.config.get("JWT_SECRET_KEY", "change-this-secret")
+    # Tunables read with _env_* come from the environment variable of the same name
+    app.config["MATCH_CACHE_SIZE"] = _env_int("MATCH_CACHE_SIZE", 1024)
+    app.config["MATCH_PAGE_SIZE"] = _env_int("MATCH_PAGE_SIZE", 20)
+    app.config["MATCH_MAX_PAGE_SIZE"] = _env_int("MATCH_MAX_PAGE_SIZE", 100)
+    app.config["PAGE_SIZE"] = _env_int("PAGE_SIZE", 50)
+    app.config["MAX_PAGE_SIZE"] = _env_int("MAX_PAGE_SIZE", 500)
+    app.config["NOTIFICATION_WORKERS"] = _env_int("NOTIFICATION_WORKERS", 4)
+    # Seconds before a delivery left in sending is assumed abandoned and retried
+    app.config["NOTIFICATION_CLAIM_TIMEOUT_SECONDS"] = _env_float("NOTIFICATION_CLAIM_TIMEOUT_SECONDS", 900)
+    # Deliveries dequeued per priority per round (urgent=8,high=4,...), and channel sends per second
+    app.config["NOTIFICATION_PRIORITY_WEIGHTS"] = _env_weights(
+        "NOTIFICATION_PRIORITY_WEIGHTS", {"urgent": 8, "high": 4, "normal": 2, "low": 1}
+    )
+    app.config["NOTIFICATION_SMS_PER_SECOND"] = _env_float("NOTIFICATION_SMS_PER_SECOND", sms_rate_budget())
+    app.config["NOTIFICATION_EMAIL_PER_SECOND"] = _env_float("NOTIFICATION_EMAIL_PER_SECOND", 20.0)
+    # Ready email deliveries a worker sends together over one pooled SMTP connection
+    app.config["NOTIFICATION_EMAIL_BATCH_SIZE"] = _env_int("NOTIFICATION_EMAIL_BATCH_SIZE", 20)
+    # Match and new job deliveries are held this long and merged into one digest per channel
+    app.config["NOTIFICATION_DIGEST_WINDOW_SECONDS"] = _env_float("NOTIFICATION_DIGEST_WINDOW_SECONDS", 300)
+    app.config["NOTIFICATION_DIGEST_MAX_ITEMS"] = _env_int("NOTIFICATION_DIGEST_MAX_ITEMS", 10)
+    # Seconds between keep-alive comments on idle notification streams
+    app.config["NOTIFICATION_STREAM_KEEPALIVE"] = _env_float("NOTIFICATION_STREAM_KEEPALIVE", 15)
+    # Days rows are kept before being archived to RETENTION_ARCHIVE_DIR and deleted
+    app.config["RETENTION_NOTIFICATION_DAYS"] = _env_float("RETENTION_NOTIFICATION_DAYS", 90)
+    app.config["RETENTION_OUTBOX_DAYS"] = _env_float("RETENTION_OUTBOX_DAYS", 14)
+    app.config["RETENTION_SEARCH_LOG_DAYS"] = _env_float("RETENTION_SEARCH_LOG_DAYS", 30)
+    app.config["RETENTION_BATCH_SIZE"] = _env_int("RETENTION_BATCH_SIZE", 500)
+    app.config["RETENTION_INTERVAL_SECONDS"] = _env_float("RETENTION_INTERVAL_SECONDS", 6 * 3600)
+    app.config["RETENTION_ARCHIVE_DIR"] = os.getenv(
+        "RETENTION_ARCHIVE_DIR", os.path.join(app.instance_path, "archive")
+    )
+    # Search timings are buffered and written in batches off the request path
+    app.config["SEARCH_LOG_BUFFER_SIZE"] = _env_int("SEARCH_LOG_BUFFER_SIZE", 10000)
+    app.config["SEARCH_LOG_BATCH_SIZE"] = _env_int("SEARCH_LOG_BATCH_SIZE", 500)
+    app.config["SEARCH_LOG_FLUSH_SECONDS"] = _env_float("SEARCH_LOG_FLUSH_SECONDS", 5.0)
+    # Seconds between rebuilding the dashboard rollup from the source tables
+    app.config["METRICS_RECONCILE_SECONDS"] = _env_float("METRICS_RECONCILE_SECONDS", 3600)
+    # Grid cell size for regional rollups, and the most buckets one timeseries request may span
+    app.config["METRICS_REGION_CELL_DEG"] = _env_float("METRICS_REGION_CELL_DEG", 0.25)
+    app.config["METRICS_MAX_BUCKETS"] = _env_int("METRICS_MAX_BUCKETS", 1000)
+    # Bearer token scrapers must send to /metrics; unset keeps the endpoint closed
+    app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN")
+    # Per-request SQL profile: X-SQL-Profile header when enabled, and a log entry for
+    # requests repeating one statement this many times or spending this long in SQL
+    app.config["SQL_PROFILE_HEADER"] = os.getenv("SQL_PROFILE_HEADER", "false").lower() == "true"
+    app.config["SQL_REPEAT_THRESHOLD"] = _env_int("SQL_REPEAT_THRESHOLD", 5)
+    app.config["SQL_SLOW_REQUEST_MS"] = _env_float("SQL_SLOW_REQUEST_MS", 250)
+    # On-demand cProfile/tracemalloc captures from /admin_metrics/profile
+    app.config["PROFILE_DIR"] = os.getenv("PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+    app.config["PROFILE_MAX_SECONDS"] = _env_float("PROFILE_MAX_SECONDS", 600)
+    app.config["PROFILE_MAX_REQUESTS"] = _env_int("PROFILE_MAX_REQUESTS", 1000)
+    # Explicit overrides, e.g. from tests
+    if config:
+        app.config.update(config)
     CORS(app)
     db.init_app(app)
+    session_hooks = app.extensions["jobmatch_session_hooks"] = {name: [] for name in SESSION_EVENTS}
     jwt = JWTManager(app)
     
     # Initialize mail for notifications
     init_mail(app)
 
+    # In-memory indexes over active jobs: locations for radius queries and
+    # required skills for candidate generation in matching
+    job_grid = JobGrid()
+    skill_index = SkillIndex()
+    # Ranked match lists per seeker, invalidated by seeker and job writes
+    match_cache = MatchCache(app.config["MATCH_CACHE_SIZE"])
+    # Open /notifications/stream connections, fed once notification changes commit
+    notification_broker = NotificationBroker()
+
+    def _normalize_token(value):
+        if value is None:
+            return None
+        return "".join(char for char in value.lower() if char.isalnum())
+
+    def _register_sqlite_functions(dbapi_connection, connection_record):
+        dbapi_connection.create_function("haversine_km", 4, haversine_km, deterministic=True)
+        dbapi_connection.create_function("normalize_token", 1, _normalize_token, deterministic=True)
+
+    def _skill_ids_by_name(names):
+        return dict(Skill.query.filter(Skill.name.in_(names)).with_entities(Skill.name, Skill.id).all())
+
+    def _encode_skills(entity, raw_skills):
+        """Map skill spellings to vocabulary IDs, adding spellings not seen before"""
+        names = unique_skills(raw_skills)
+        known = _skill_ids_by_name(names) if names else {}
+        missing = [name for name in names if name not in known]
+        if missing:
+            # A concurrent request may add the same spelling; keep whichever row wins
+            db.session.execute(
+                sqlite_insert(Skill).on_conflict_do_nothing(index_elements=["name"]),
+                [{"name": name, "created_at": datetime.utcnow()} for name in missing],
+            )
+            known.update(_skill_ids_by_name(missing))
+        entity.skill_ids = format_skill_ids([known[name] for name in names])
+
+    def _normalize_mobile(raw_number):
+        """Store mobile numbers in E.164 so SMS sends skip normalization; keep invalid input as given"""
+        if not raw_number:
+            return raw_number
+        return normalize_phone(raw_number) or raw_number
+
+    def _match_row(seeker_id, job_id, score, details):
+        return SeekerJobMatch(
+            seeker_id=seeker_id,
+            job_id=job_id,
+            score=score,
+            match_percent=round(score * 100, 1),
+            distance_km=details["distance_km"],
+            details=json.dumps(details),
+        )
+
+    def _materialize_seeker(seeker):
+        """Rewrite the seeker's stored matches against active jobs inside their radius"""
+        SeekerJobMatch.query.filter_by(seeker_id=seeker.id).delete()
+        nearby = job_grid.within(seeker.latitude, seeker.longitude, seeker.max_distance_km)
+        if not nearby:
+            return
+        jobs = Job.query.filter(Job.id.in_(nearby.keys()), Job.active.is_(True)).all()
+        distances = [nearby[job.id] for job in jobs]
+        skill_percents = skill_index.skill_percents(
+            skill_map(seeker.skills, seeker.skill_ids), nearby.keys()
+        )
+        scored = match_scores_batch(seeker, jobs, distances, skill_percents)
+        db.session.add_all(
+            _match_row(seeker.id, job.id, score, details)
+            for job, (score, details) in zip(jobs, scored)
+        )
+
+    def _materialize_job(job):
+        """Rewrite the job's stored matches for every seeker whose radius covers it"""
+        SeekerJobMatch.query.filter_by(job_id=job.id).delete()
+        if not job.active:
+            return
+        max_radius = db.session.query(db.func.max(Seeker.max_distance_km)).scalar()
+        if max_radius is None:
+            return
+        min_lat, max_lat, min_lon, max_lon = bounding_box(job.latitude, job.longitude, max_radius)
+        distance = db.func.haversine_km(Seeker.latitude, Seeker.longitude, job.latitude, job.longitude)
+        seekers = (
+            Seeker.query.filter(
+                Seeker.latitude.between(min_lat, max_lat),
+                Seeker.longitude.between(min_lon, max_lon),
+                distance <= Seeker.max_distance_km,
+            )
+            .add_columns(distance)
+            .all()
+        )
+        for seeker, distance_km in seekers:
+            score, details = match_score(seeker, job, distance_km)
+            db.session.add(_match_row(seeker.id, job.id, score, details))
+
     with app.app_context():
+        event.listen(db.engine, "connect", _register_sqlite_functions)
+        if not enable_incremental_vacuum(db.engine):
+            print(
+                "Retention cannot return freed pages to the filesystem until the database is "
+                "converted once with: flask --app app enable-incremental-vacuum"
+            )
         db.create_all()
         try:
-            columns = db.session.execute(text("PRAGMA table_info(seeker)")).fetchall()
-            column_names = {column[1] for column in columns}
-            if "mobile_number" not in column_names:
-                db.session.execute(text("ALTER TABLE seeker ADD COLUMN mobile_number VARCHAR(20)"))
-                db.session.commit()
+            for table, column, column_type in [
+                ("seeker", "mobile_number", "VARCHAR(20)"),
+                ("seeker", "skill_ids", "TEXT"),
+                ("job", "skill_ids", "TEXT"),
+                ("notification_outbox", "priority", "VARCHAR(20) DEFAULT 'normal'"),
+                ("notification_outbox", "digest_summary", "TEXT"),
+                ("notification_outbox", "claimed_at", "DATETIME"),
+                ("user", "unread_notifications", "INTEGER NOT NULL DEFAULT 0"),
+            ]:
+                columns = db.session.execute(text(f"PRAGMA table_info({table})")).fetchall()
+                column_names = {column[1] for column in columns}
+                if column not in column_names:
+                    db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+                    db.session.commit()
+        except Exception:
+            db.session.rollback()
+        try:
+            # The unused packed skill bitset from earlier versions
+            for table in ("seeker", "job"):
+                columns = db.session.execute(text(f"PRAGMA table_info({table})")).fetchall()
+                if "skill_bits" in {column[1] for column in columns}:
+                    db.session.execute(text(f"ALTER TABLE {table} DROP COLUMN skill_bits"))
+                    db.session.commit()
         except Exception:
             db.session.rollback()
+        for seeker in Seeker.query.filter(Seeker.skill_ids.is_(None)).all():
+            _encode_skills(seeker, seeker.skills)
+        for job in Job.query.filter(Job.skill_ids.is_(None)).all():
+            _encode_skills(job, job.required_skills)
+        db.session.commit()
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+        app.config["JOB_SEARCH_FTS"] = ensure_job_fts(db.session)
+
+        active_jobs = Job.query.filter_by(active=True)
+        job_grid.rebuild(active_jobs.with_entities(Job.id, Job.latitude, Job.longitude).all())
+        skill_index.rebuild(
+            active_jobs.with_entities(Job.id, Job.required_skills, Job.skill_ids).all()
+        )
+        if SeekerJobMatch.query.first() is None:
+            for seeker in Seeker.query.all():
+                _materialize_seeker(seeker)
+            db.session.commit()
+        # Unread counters start from the table; later changes are applied as they flush
+        unread = (
+            Notification.query.filter(
+                Notification.user_id == User.id, Notification.is_read.is_(False)
+            )
+            .with_entities(func.count(Notification.id))
+            .scalar_subquery()
+        )
+        User.query.update({"unread_notifications": unread}, synchronize_session=False)
+        db.session.commit()
+
+    # Route latency, SQL and delivery timings for /metrics
+    telemetry = Telemetry()
+
+    def _query_started(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _query_finished(conn, cursor, statement, parameters, context, executemany):
+        telemetry.record_query(
+            statement, time.perf_counter() - conn.info["query_started"].pop(), context, executemany
+        )
+
+    def _query_failed(exception_context):
+        # A statement that raises never reaches after_cursor_execute
+        if exception_context.connection is not None:
+            exception_context.connection.info.pop("query_started", None)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", _query_started)
+        event.listen(db.engine, "after_cursor_execute", _query_finished)
+        event.listen(db.engine, "handle_error", _query_failed)
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+        telemetry.begin_request()
+
+    @app.after_request
+    def _add_sql_profile_header(response):
+        g.response_status = response.status_code
+        profile = telemetry.current_request()
+        if profile is not None and app.config["SQL_PROFILE_HEADER"]:
+            response.headers["X-SQL-Profile"] = profile.header(app.config["SQL_REPEAT_THRESHOLD"])
+        return response
+
+    @app.teardown_request
+    def _record_request_timing(exc):
+        # Runs for unhandled exceptions too, so 500s are counted and the
+        # thread's profile never outlives its request
+        started = g.pop("request_started", None)
+        status = g.pop("response_status", 500) if exc is None else 500
+        profile = telemetry.end_request()
+        if started is None or profile is None:
+            return
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        telemetry.record_request(request.method, route, status, time.perf_counter() - started, profile.queries)
+
+        threshold = app.config["SQL_REPEAT_THRESHOLD"]
+        if profile.repeated(threshold) or profile.seconds * 1000 >= app.config["SQL_SLOW_REQUEST_MS"]:
+            print(f"SQL profile for {request.method} {route}: {profile.report(threshold)}")
+
+    profiler = Profiler(app.config["PROFILE_DIR"])
+
+    @app.before_request
+    def _start_profile():
+        route = request.url_rule.rule if request.url_rule is not None else None
+        g.profile_token = profiler.before_request(route)
+
+    @app.teardown_request
+    def _finish_profile(exc):
+        profiler.after_request(g.pop("profile_token", None))
+
+    @app.cli.command("enable-incremental-vacuum")
+    def enable_incremental_vacuum_command():
+        """Rewrite the database once (full VACUUM) so retention can free pages incrementally"""
+        with app.app_context():
+            enabled = enable_incremental_vacuum(db.engine, convert=True)
+        print("Incremental auto-vacuum enabled" if enabled else "Could not enable incremental auto-vacuum")
+
+    # Background delivery of queued email/SMS notifications
+    outbox = OutboxDispatcher(
+        app,
+        workers=app.config["NOTIFICATION_WORKERS"],
+        priority_weights=app.config["NOTIFICATION_PRIORITY_WEIGHTS"],
+        channel_budgets={
+            "sms": app.config["NOTIFICATION_SMS_PER_SECOND"],
+            "email": app.config["NOTIFICATION_EMAIL_PER_SECOND"],
+        },
+        digest_window=app.config["NOTIFICATION_DIGEST_WINDOW_SECONDS"],
+        digest_max=app.config["NOTIFICATION_DIGEST_MAX_ITEMS"],
+        claim_timeout=app.config["NOTIFICATION_CLAIM_TIMEOUT_SECONDS"],
+        email_batch_size=app.config["NOTIFICATION_EMAIL_BATCH_SIZE"],
+        on_delivery=telemetry.record_delivery,
+    )
+    outbox.start()
+
+    def _release_notifications(rows):
+        """Drop outbox rows and unread counts that belong to notifications being pruned"""
+        NotificationOutbox.query.filter(
+            NotificationOutbox.notification_id.in_([row["id"] for row in rows])
+        ).delete(synchronize_session=False)
+        unread = Counter(row["user_id"] for row in rows if not row["is_read"])
+        for user_id, count in unread.items():
+            User.query.filter_by(id=user_id).update(
+                {"unread_notifications": User.unread_notifications - count},
+                synchronize_session=False,
+            )
+
+    # Periodic pruning of append-only tables
+    retention = RetentionManager(
+        app,
+        [
+            RetentionPolicy(
+                NotificationOutbox,
+                app.config["RETENTION_OUTBOX_DAYS"],
+                conditions=[NotificationOutbox.status.in_(["sent", "failed"])],
+            ),
+            RetentionPolicy(
+                Notification,
+                app.config["RETENTION_NOTIFICATION_DAYS"],
+                on_delete=_release_notifications,
+            ),
+            RetentionPolicy(SearchLog, app.config["RETENTION_SEARCH_LOG_DAYS"]),
+        ],
+        archive_dir=app.config["RETENTION_ARCHIVE_DIR"],
+        batch_size=app.config["RETENTION_BATCH_SIZE"],
+    )
+    retention.start(app.config["RETENTION_INTERVAL_SECONDS"])
+
+    # Dashboard counters follow every flush; reconciliation catches anything written around them
+    metrics = MetricsRollup(app, cell_size_deg=app.config["METRICS_REGION_CELL_DEG"])
+    session_hooks["after_flush"].append(metrics.track)
+    metrics.reconcile()
+    metrics.start(app.config["METRICS_RECONCILE_SECONDS"])
+
+    search_log = SearchLogBuffer(
+        app,
+        max_size=app.config["SEARCH_LOG_BUFFER_SIZE"],
+        batch_size=app.config["SEARCH_LOG_BATCH_SIZE"],
+        flush_interval=app.config["SEARCH_LOG_FLUSH_SECONDS"],
+        on_write=metrics.record_searches,
+    )
+    search_log.start()
+
+    telemetry.gauge(
+        "match_cache_entries", "Seekers with a cached match list", lambda: match_cache.stats()["size"]
+    )
+    telemetry.gauge(
+        "notification_backlog", "Deliveries waiting in the scheduler", lambda: len(outbox.scheduler)
+    )
+    telemetry.gauge(
+        "search_log_buffered", "Search timings waiting to be written", lambda: search_log.stats()["buffered"]
+    )
+    telemetry.gauge("notification_streams", "Open notification streams", notification_broker.connections)
 
     def _json_error(message, status=400):
         return jsonify({"error": message}), status
@@ -109,6 +550,19 @@ def create_app():
             "longitude": seeker.longitude,
         }
 
+    def _match_to_dict(match_percent, distance_km, job):
+        return {
+            "job_id": job.id,
+            "title": job.title,
+            "wage": job.wage,
+            "duration": job.duration,
+            "work_hours": job.work_hours,
+            "distance_km": distance_km,
+            "match_percent": match_percent,
+            "latitude": job.latitude,
+            "longitude": job.longitude,
+        }
+
     def _application_to_dict(application):
         return {
             "application_id": application.id,
@@ -118,6 +572,115 @@ def create_app():
             "status": application.status,
         }
 
+    def _job_changed(job, old_location=None):
+        """Refresh job indexes and drop cached matches near the job's old and new location"""
+        job_grid.sync(job)
+        skill_index.sync(job)
+        if old_location is not None and old_location != (job.latitude, job.longitude):
+            match_cache.invalidate_location(*old_location)
+        match_cache.invalidate_location(job.latitude, job.longitude)
+
+    def _encode_cursor(sort_value, row_id):
+        if isinstance(sort_value, datetime):
+            sort_value = sort_value.isoformat()
+        raw = json.dumps([sort_value, row_id]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def _decode_cursor(cursor, sort_column):
+        try:
+            sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if isinstance(sort_column.type, db.DateTime):
+                sort_value = datetime.fromisoformat(sort_value)
+            return sort_value, int(row_id)
+        except (ValueError, TypeError):
+            abort(make_response(_json_error("Invalid cursor")))
+
+    def _paginate(query, sort_column, id_column, cursor_key, descending=False):
+        """
+        Keyset pagination on (sort_column, id_column)
+
+        Reads ?limit= (page size, default PAGE_SIZE, capped at MAX_PAGE_SIZE) and
+        ?cursor= (opaque token from a previous page's next_cursor).
+
+        Returns:
+            tuple: (rows for this page, next_cursor or None)
+        """
+        limit = request.args.get("limit", app.config["PAGE_SIZE"], type=int)
+        limit = max(1, min(limit, app.config["MAX_PAGE_SIZE"]))
+        cursor = request.args.get("cursor")
+        key = tuple_(sort_column, id_column)
+        if cursor:
+            position = tuple_(*_decode_cursor(cursor, sort_column))
+            query = query.filter(key < position if descending else key > position)
+        if descending:
+            query = query.order_by(sort_column.desc(), id_column.desc())
+        else:
+            query = query.order_by(sort_column, id_column)
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(*cursor_key(rows[-1]))
+        return rows, next_cursor
+
+    def _paginate_offset(query, *order_by):
+        """
+        Offset pagination for orderings that shift between requests
+
+        Full-text rank depends on statistics over every indexed job, so inserting
+        or editing any job changes it and a keyset cursor on it could skip or
+        repeat rows. The cursor here holds the position of the next row instead.
+
+        Returns:
+            tuple: (rows for this page, next_cursor or None)
+        """
+        limit = request.args.get("limit", app.config["PAGE_SIZE"], type=int)
+        limit = max(1, min(limit, app.config["MAX_PAGE_SIZE"]))
+        offset = 0
+        cursor = request.args.get("cursor")
+        if cursor:
+            try:
+                offset = int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"])
+            except (ValueError, TypeError, KeyError):
+                abort(make_response(_json_error("Invalid cursor")))
+            if offset < 0:
+                abort(make_response(_json_error("Invalid cursor")))
+        rows = query.order_by(*order_by).offset(offset).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            raw = json.dumps({"offset": offset + limit}).encode()
+            next_cursor = base64.urlsafe_b64encode(raw).decode()
+        return rows, next_cursor
+
+    def _with_distance(jobs, lat, lon, max_distance):
+        """
+        Attach a SQL distance column and push radius filtering into SQLite
+
+        Returns:
+            tuple: (query yielding (job, distance_km) rows, sort column for pagination)
+        """
+        if lat is None or lon is None:
+            return jobs.add_columns(db.null().label("distance_km")), Job.created_at
+        distance = db.func.haversine_km(lat, lon, Job.latitude, Job.longitude)
+        if max_distance is not None:
+            min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, max_distance)
+            jobs = jobs.filter(
+                Job.latitude.between(min_lat, max_lat),
+                Job.longitude.between(min_lon, max_lon),
+                distance <= max_distance,
+            )
+        return jobs.add_columns(distance.label("distance_km")), distance
+
+    def _paginate_jobs(jobs, sort_column):
+        """
+        Paginate (job, distance_km) rows by creation time, or by a computed
+        distance sort column that is the last column of each row
+        """
+        if sort_column is Job.created_at:
+            return _paginate(jobs, Job.created_at, Job.id, lambda row: (row[0].created_at, row[0].id))
+        return _paginate(jobs, sort_column, Job.id, lambda row: (row[-1], row[0].id))
+
     def _sample_job_metrics(job):
         distance_km = round(5 + (job.id % 7) * 3.2, 1)
         estimated_days = 3 + (job.id % 5)
@@ -125,7 +688,7 @@ def create_app():
         return distance_km, estimated_days, estimated_hours
 
     def _create_notification(user_id, notification_type, title, message, related_job_id=None, related_application_id=None, priority="normal"):
-        """Create a notification in the database"""
+        """Create a notification in the database (flushed by the caller)"""
         notification = Notification(
             user_id=user_id,
             notification_type=notification_type,
@@ -136,82 +699,246 @@ def create_app():
             priority=priority,
         )
         db.session.add(notification)
-        db.session.flush()
+        _notification_changed(user_id, notification)
         return notification
 
-    def _send_notification(user_id, notification_type, content_dict, related_job_id=None, related_application_id=None, priority="normal"):
+    def _notification_changed(user_id, notification=None):
+        """Push a new notification, or just a fresh unread count, to the user's streams on commit"""
+        db.session.info.setdefault("notification_changes", []).append((user_id, notification))
+
+    def _collect_notification_events(session, flush_context):
+        # Serialize while the rows are loaded; commit expires them
+        events = session.info.setdefault("notification_events", [])
+        pending = []
+        for user_id, notification in session.info.pop("notification_changes", []):
+            if notification is not None and notification.id is None:
+                pending.append((user_id, notification))
+            else:
+                events.append(
+                    (user_id, _notification_to_dict(notification) if notification is not None else None)
+                )
+        if pending:
+            session.info["notification_changes"] = pending
+
+    def _publish_notification_events(session):
+        events = session.info.pop("notification_events", [])
+        events += [
+            (user_id, None)
+            for user_id, notification in session.info.pop("notification_changes", [])
+            if notification is None
+        ]
+        for user_id, payload in events:
+            if payload is None:
+                notification_broker.publish(user_id, "unread")
+            else:
+                notification_broker.publish(user_id, "notification", payload)
+
+    def _discard_notification_events(session):
+        session.info.pop("notification_changes", None)
+        session.info.pop("notification_events", None)
+
+    def _count_unread_changes(session, flush_context):
+        """Apply flushed notification inserts, reads and deletes to User.unread_notifications"""
+        deltas = Counter()
+        for obj in session.new:
+            if isinstance(obj, Notification) and not obj.is_read:
+                deltas[obj.user_id] += 1
+        for obj in session.deleted:
+            if isinstance(obj, Notification) and not obj.is_read:
+                deltas[obj.user_id] -= 1
+        for obj in session.dirty:
+            if not isinstance(obj, Notification):
+                continue
+            history = get_history(obj, "is_read")
+            if history.added and history.deleted:
+                was_read, is_read = bool(history.deleted[0]), bool(history.added[0])
+                if was_read != is_read:
+                    deltas[obj.user_id] += 1 if was_read else -1
+        for user_id, delta in deltas.items():
+            if delta:
+                session.connection().execute(
+                    update(User)
+                    .where(User.id == user_id)
+                    .values(unread_notifications=User.unread_notifications + delta)
+                )
+
+    def _unread_count(user_id):
+        return (
+            User.query.filter_by(id=user_id).with_entities(User.unread_notifications).scalar() or 0
+        )
+
+    session_hooks["after_flush"].append(_count_unread_changes)
+    session_hooks["after_flush_postexec"].append(_collect_notification_events)
+    session_hooks["after_commit"].append(_publish_notification_events)
+    session_hooks["after_rollback"].append(_discard_notification_events)
+
+    def _send_notifications(items):
         """
-        Send notification via multiple channels based on user preferences
+        Send many notifications with set-based lookups and a single commit
         
         Args:
-            user_id: User ID to send notification to
-            notification_type: Type of notification (match, application_update, etc.)
-            content_dict: Dict with 'title', 'message', 'email_html' keys
-            related_job_id: Optional job ID
-            related_application_id: Optional application ID
-            priority: Notification priority (low, normal, high, urgent)
+            items: List of dicts with 'user_id', 'notification_type', 'content_dict' and
+                optional 'related_job_id', 'related_application_id', 'priority' keys
+                (same meaning as the _send_notification arguments)
+        
+        Returns:
+            list: One bool per item, True if the notification was created
         """
+        results = [False] * len(items)
+        if not items:
+            return results
         try:
-            user = User.query.get(user_id)
-            if not user:
-                return False
+            user_ids = {item["user_id"] for item in items}
+            users = {user.id: user for user in User.query.filter(User.id.in_(user_ids)).all()}
             
-            # Get user preferences (create default if not exists)
-            pref = NotificationPreference.query.filter_by(user_id=user_id).first()
-            if not pref:
-                pref = NotificationPreference(user_id=user_id)
-                db.session.add(pref)
+            # Get user preferences (create defaults for users without any)
+            prefs = {
+                pref.user_id: pref
+                for pref in NotificationPreference.query.filter(
+                    NotificationPreference.user_id.in_(users.keys())
+                ).all()
+            }
+            missing = [NotificationPreference(user_id=user_id) for user_id in users if user_id not in prefs]
+            if missing:
+                db.session.add_all(missing)
                 db.session.flush()
+                prefs.update((pref.user_id, pref) for pref in missing)
             
-            # Check if user wants this type of notification
-            notify_map = {
-                "match": pref.notify_on_match,
-                "application_update": pref.notify_on_application_update,
-                "interview": pref.notify_on_interview,
-                "deadline": pref.notify_on_deadline,
-            }
-            if not notify_map.get(notification_type, True):
-                return False
+            seeker_ids = {user.seeker_id for user in users.values() if user.seeker_id}
+            mobile_numbers = dict(
+                Seeker.query.filter(Seeker.id.in_(seeker_ids))
+                .with_entities(Seeker.id, Seeker.mobile_number)
+                .all()
+            ) if seeker_ids else {}
             
-            # Create in-app notification
-            notification = _create_notification(
-                user_id=user_id,
-                notification_type=notification_type,
-                title=content_dict["title"],
-                message=content_dict["message"],
-                related_job_id=related_job_id,
-                related_application_id=related_application_id,
-                priority=priority,
-            )
+            # Digest-type notifications already sent for the same job within the
+            # digest window are dropped
+            dedupe_keys = {
+                (item["user_id"], item["notification_type"], item.get("related_job_id"))
+                for item in items
+                if item["notification_type"] in DIGEST_TYPES and item.get("related_job_id")
+            }
+            already_sent = set(
+                Notification.query.filter(
+                    tuple_(
+                        Notification.user_id,
+                        Notification.notification_type,
+                        Notification.related_job_id,
+                    ).in_(list(dedupe_keys)),
+                    Notification.created_at >= datetime.utcnow() - timedelta(
+                        seconds=app.config["NOTIFICATION_DIGEST_WINDOW_SECONDS"]
+                    ),
+                )
+                .with_entities(
+                    Notification.user_id, Notification.notification_type, Notification.related_job_id
+                )
+                .all()
+            ) if dedupe_keys else set()
             
-            # Send email if enabled
-            if pref.email_enabled and pref.app_enabled and user.email:
-                email_sent = send_email(
-                    to_email=user.email,
-                    subject=content_dict["title"],
-                    body=content_dict["message"],
-                    html_body=content_dict.get("email_html"),
+            created = []
+            for position, item in enumerate(items):
+                user = users.get(item["user_id"])
+                if not user:
+                    continue
+                pref = prefs[user.id]
+                
+                # Check if user wants this type of notification
+                notify_map = {
+                    "match": pref.notify_on_match,
+                    "application_update": pref.notify_on_application_update,
+                    "interview": pref.notify_on_interview,
+                    "deadline": pref.notify_on_deadline,
+                }
+                if not notify_map.get(item["notification_type"], True):
+                    continue
+                
+                dedupe_key = (user.id, item["notification_type"], item.get("related_job_id"))
+                if dedupe_key in already_sent:
+                    continue
+                if dedupe_key in dedupe_keys:
+                    already_sent.add(dedupe_key)
+                
+                # Create in-app notification
+                content_dict = item["content_dict"]
+                notification = _create_notification(
+                    user_id=user.id,
+                    notification_type=item["notification_type"],
+                    title=content_dict["title"],
+                    message=content_dict["message"],
+                    related_job_id=item.get("related_job_id"),
+                    related_application_id=item.get("related_application_id"),
+                    priority=item.get("priority", "normal"),
                 )
-                notification.sent_email = email_sent
+                created.append((notification, user, pref, content_dict))
+                results[position] = True
             
-            # Send SMS if enabled (for seekers)
-            if pref.sms_enabled and user.seeker_id:
-                seeker = Seeker.query.get(user.seeker_id)
-                if seeker and seeker.mobile_number and seeker.mobile_number.strip():
+            # One bulk insert for all notifications so outbox rows can reference them
+            db.session.flush()
+            
+            for notification, user, pref, content_dict in created:
+                digest_summary = None
+                if notification.notification_type in DIGEST_TYPES:
+                    digest_summary = content_dict.get("summary")
+                
+                # Queue email if enabled
+                if pref.email_enabled and pref.app_enabled and user.email:
+                    outbox.enqueue(
+                        notification,
+                        channel="email",
+                        recipient=user.email,
+                        subject=content_dict["title"],
+                        body=content_dict["message"],
+                        html_body=content_dict.get("email_html"),
+                        digest_summary=digest_summary,
+                    )
+                
+                # Queue SMS if enabled (for seekers)
+                mobile_number = mobile_numbers.get(user.seeker_id)
+                if pref.sms_enabled and mobile_number and mobile_number.strip():
                     sms_message = format_sms_for_rural(
                         content_dict["title"],
                         content_dict["message"]
                     )
-                    sms_sent = send_sms(seeker.mobile_number, sms_message)
-                    notification.sent_sms = sms_sent
+                    outbox.enqueue(
+                        notification,
+                        channel="sms",
+                        recipient=mobile_number,
+                        body=sms_message,
+                        subject=content_dict["title"],
+                        digest_summary=digest_summary,
+                    )
             
             db.session.commit()
-            return True
+            outbox.wake()
+            return results
             
         except Exception as e:
-            print(f"Failed to send notification: {str(e)}")
+            print(f"Failed to send notifications: {str(e)}")
             db.session.rollback()
-            return False
+            return [False] * len(items)
+
+    def _send_notification(user_id, notification_type, content_dict, related_job_id=None, related_application_id=None, priority="normal"):
+        """
+        Send notification via multiple channels based on user preferences
+        
+        Args:
+            user_id: User ID to send notification to
+            notification_type: Type of notification (match, application_update, etc.)
+            content_dict: Dict with 'title', 'message', 'email_html' keys
+            related_job_id: Optional job ID
+            related_application_id: Optional application ID
+            priority: Notification priority (low, normal, high, urgent)
+        """
+        return _send_notifications([
+            {
+                "user_id": user_id,
+                "notification_type": notification_type,
+                "content_dict": content_dict,
+                "related_job_id": related_job_id,
+                "related_application_id": related_application_id,
+                "priority": priority,
+            }
+        ])[0]
 
     def _notification_to_dict(notification):
         """Convert notification to dictionary"""
@@ -279,7 +1006,7 @@ def create_app():
                 return missing
             seeker = Seeker(
                 name=payload["name"],
-                mobile_number=payload.get("mobile_number"),
+                mobile_number=_normalize_mobile(payload.get("mobile_number")),
                 age=payload["age"],
                 gender=payload["gender"],
                 pwd_status=payload.get("pwd_status", False),
@@ -293,8 +1020,10 @@ def create_app():
                 latitude=payload["latitude"],
                 longitude=payload["longitude"],
             )
+            _encode_skills(seeker, seeker.skills)
             db.session.add(seeker)
             db.session.flush()
+            _materialize_seeker(seeker)
         elif role == "provider":
             provider_fields = [
                 "business_name",
@@ -372,8 +1101,13 @@ def create_app():
     @app.route("/providers", methods=["GET"])
     @_require_roles("admin")
     def list_providers():
-        providers = Provider.query.all()
-        return jsonify({"providers": [_provider_to_dict(provider) for provider in providers]})
+        providers, next_cursor = _paginate(
+            Provider.query, Provider.created_at, Provider.id, lambda row: (row.created_at, row.id)
+        )
+        return jsonify({
+            "providers": [_provider_to_dict(provider) for provider in providers],
+            "next_cursor": next_cursor,
+        })
 
     @app.route("/providers", methods=["POST"])
     @_require_roles("admin")
@@ -430,8 +1164,13 @@ def create_app():
     @app.route("/seekers", methods=["GET"])
     @_require_roles("admin")
     def list_seekers():
-        seekers = Seeker.query.all()
-        return jsonify({"seekers": [_seeker_to_dict(seeker) for seeker in seekers]})
+        seekers, next_cursor = _paginate(
+            Seeker.query, Seeker.created_at, Seeker.id, lambda row: (row.created_at, row.id)
+        )
+        return jsonify({
+            "seekers": [_seeker_to_dict(seeker) for seeker in seekers],
+            "next_cursor": next_cursor,
+        })
 
     @app.route("/seekers/<int:seeker_id>", methods=["GET"])
     @_require_roles("admin", "seeker")
@@ -468,7 +1207,13 @@ def create_app():
         ]:
             if field in payload:
                 setattr(seeker, field, payload[field])
+        if "mobile_number" in payload:
+            seeker.mobile_number = _normalize_mobile(seeker.mobile_number)
+        if "skills" in payload:
+            _encode_skills(seeker, seeker.skills)
+        _materialize_seeker(seeker)
         db.session.commit()
+        match_cache.invalidate_seeker(seeker.id)
         return jsonify(_seeker_to_dict(seeker))
 
     @app.route("/jobs", methods=["GET"])
@@ -500,15 +1245,9 @@ def create_app():
         lat = request.args.get("lat", type=float)
         lon = request.args.get("lon", type=float)
         max_distance = request.args.get("max_distance", type=float)
-        results = []
-        for job in jobs.all():
-            distance_km = None
-            if lat is not None and lon is not None:
-                distance_km = haversine_km(lat, lon, job.latitude, job.longitude)
-                if max_distance is not None and distance_km > max_distance:
-                    continue
-            results.append(_job_to_dict(job, distance_km))
-        return jsonify({"jobs": results})
+        rows, next_cursor = _paginate_jobs(*_with_distance(jobs, lat, lon, max_distance))
+        results = [_job_to_dict(job, distance_km) for job, distance_km in rows]
+        return jsonify({"jobs": results, "next_cursor": next_cursor})
 
     @app.route("/jobs", methods=["POST"])
     @_require_roles("provider", "admin")
@@ -552,8 +1291,12 @@ def create_app():
             longitude=payload["longitude"],
             active=payload.get("active", True),
         )
+        _encode_skills(job, job.required_skills)
         db.session.add(job)
+        db.session.flush()
+        _materialize_job(job)
         db.session.commit()
+        _job_changed(job)
         return jsonify(_job_to_dict(job)), 201
 
     @app.route("/jobs/<int:job_id>", methods=["GET"])
@@ -569,6 +1312,7 @@ def create_app():
         if claims.get("role") == "provider" and claims.get("provider_id") != job.provider_id:
             return _json_error("Unauthorized", 403)
         payload = request.get_json(force=True)
+        old_location = (job.latitude, job.longitude)
         for field in [
             "title",
             "required_skills",
@@ -586,7 +1330,11 @@ def create_app():
         ]:
             if field in payload:
                 setattr(job, field, payload[field])
+        if "required_skills" in payload:
+            _encode_skills(job, job.required_skills)
+        _materialize_job(job)
         db.session.commit()
+        _job_changed(job, old_location)
         return jsonify(_job_to_dict(job))
 
     @app.route("/jobs/<int:job_id>", methods=["DELETE"])
@@ -597,7 +1345,9 @@ def create_app():
         if claims.get("role") == "provider" and claims.get("provider_id") != job.provider_id:
             return _json_error("Unauthorized", 403)
         job.active = False
+        _materialize_job(job)
         db.session.commit()
+        _job_changed(job)
         return jsonify({"job_id": job.id, "active": job.active})
 
     @app.route("/applications", methods=["POST"])
@@ -624,38 +1374,42 @@ def create_app():
             status="applied",
         )
         db.session.add(application)
+
+        # Provider notification is prepared while job and seeker are still loaded
+        provider_user_id = (
+            User.query.filter_by(provider_id=job.provider_id).with_entities(User.id).limit(1).scalar()
+        )
+        content = {
+            "title": "New Job Application",
+            "message": f"{seeker.name} applied for '{job.title}' with {score*100:.0f}% match score",
+            "email_html": f"""
+            <h2>New Application Received</h2>
+            <p>You have received a new application for your job posting:</p>
+            <ul>
+                <li><strong>Job:</strong> {job.title}</li>
+                <li><strong>Applicant:</strong> {seeker.name}</li>
+                <li><strong>Match Score:</strong> {score*100:.0f}%</li>
+                <li><strong>Contact:</strong> {seeker.mobile_number or 'N/A'}</li>
+            </ul>
+            <p>Login to review the application.</p>
+            """
+        }
+        db.session.flush()
+        result = _application_to_dict(application)
         db.session.commit()
         
         # Send notification to provider about new application
-        provider = Provider.query.get(job.provider_id)
-        if provider:
-            provider_user = User.query.filter_by(provider_id=provider.id).first()
-            if provider_user:
-                content = {
-                    "title": "New Job Application",
-                    "message": f"{seeker.name} applied for '{job.title}' with {score*100:.0f}% match score",
-                    "email_html": f"""
-                    <h2>New Application Received</h2>
-                    <p>You have received a new application for your job posting:</p>
-                    <ul>
-                        <li><strong>Job:</strong> {job.title}</li>
-                        <li><strong>Applicant:</strong> {seeker.name}</li>
-                        <li><strong>Match Score:</strong> {score*100:.0f}%</li>
-                        <li><strong>Contact:</strong> {seeker.mobile_number or 'N/A'}</li>
-                    </ul>
-                    <p>Login to review the application.</p>
-                    """
-                }
-                _send_notification(
-                    user_id=provider_user.id,
-                    notification_type="application_update",
-                    content_dict=content,
-                    related_job_id=job.id,
-                    related_application_id=application.id,
-                    priority="normal"
-                )
+        if provider_user_id:
+            _send_notification(
+                user_id=provider_user_id,
+                notification_type="application_update",
+                content_dict=content,
+                related_job_id=result["job_id"],
+                related_application_id=result["application_id"],
+                priority="normal"
+            )
         
-        return jsonify(_application_to_dict(application)), 201
+        return jsonify(result), 201
 
     @app.route("/applications", methods=["GET"])
     @_require_roles("seeker", "provider", "admin")
@@ -678,44 +1432,54 @@ def create_app():
             if job_ids:
                 query = query.filter(Application.job_id.in_(job_ids))
             else:
-                return jsonify({"applications": []})
+                return jsonify({"applications": [], "next_cursor": None})
 
-        applications = query.all()
-        return jsonify({"applications": [_application_to_dict(app_item) for app_item in applications]})
+        applications, next_cursor = _paginate(
+            query, Application.created_at, Application.id, lambda row: (row.created_at, row.id)
+        )
+        return jsonify({
+            "applications": [_application_to_dict(app_item) for app_item in applications],
+            "next_cursor": next_cursor,
+        })
 
     @app.route("/applications/<int:application_id>", methods=["PATCH"])
     @_require_roles("provider", "admin")
     def update_application(application_id):
         application = Application.query.get_or_404(application_id)
+        job = Job.query.get(application.job_id)
         claims = get_jwt()
         if claims.get("role") == "provider":
-            job = Job.query.get(application.job_id)
             if not job or job.provider_id != claims.get("provider_id"):
                 return _json_error("Unauthorized", 403)
         payload = request.get_json(force=True)
         old_status = application.status
         if "status" in payload:
             application.status = payload["status"]
+        status_changed = "status" in payload and old_status != application.status
+        if status_changed and job:
+            seeker_user_id = (
+                User.query.filter_by(seeker_id=application.seeker_id)
+                .with_entities(User.id)
+                .limit(1)
+                .scalar()
+            )
+            content = get_application_update_notification(job.title, application.status)
+            priority = "high" if application.status in ["interview", "accepted"] else "normal"
+        result = _application_to_dict(application)
         db.session.commit()
         
         # Send notification to seeker about status change
-        if "status" in payload and old_status != application.status:
-            job = Job.query.get(application.job_id)
-            seeker = Seeker.query.get(application.seeker_id)
-            seeker_user = User.query.filter_by(seeker_id=seeker.id).first()
-            if seeker_user and job:
-                content = get_application_update_notification(job.title, application.status)
-                priority = "high" if application.status in ["interview", "accepted"] else "normal"
-                _send_notification(
-                    user_id=seeker_user.id,
-                    notification_type="application_update",
-                    content_dict=content,
-                    related_job_id=job.id,
-                    related_application_id=application.id,
-                    priority=priority
-                )
+        if status_changed and job and seeker_user_id:
+            _send_notification(
+                user_id=seeker_user_id,
+                notification_type="application_update",
+                content_dict=content,
+                related_job_id=result["job_id"],
+                related_application_id=result["application_id"],
+                priority=priority
+            )
         
-        return jsonify(_application_to_dict(application))
+        return jsonify(result)
 
     @app.route("/feedback", methods=["POST"])
     @_require_roles("seeker", "provider", "admin")
@@ -756,7 +1520,7 @@ def create_app():
             return missing
         seeker = Seeker(
             name=payload["name"],
-            mobile_number=payload.get("mobile_number"),
+            mobile_number=_normalize_mobile(payload.get("mobile_number")),
             age=payload["age"],
             gender=payload["gender"],
             pwd_status=payload.get("pwd_status", False),
@@ -770,7 +1534,10 @@ def create_app():
             latitude=payload["latitude"],
             longitude=payload["longitude"],
         )
+        _encode_skills(seeker, seeker.skills)
         db.session.add(seeker)
+        db.session.flush()
+        _materialize_seeker(seeker)
         db.session.commit()
         return jsonify({"seeker_id": seeker.id}), 201
 
@@ -807,8 +1574,12 @@ def create_app():
             latitude=payload["latitude"],
             longitude=payload["longitude"],
         )
+        _encode_skills(job, job.required_skills)
         db.session.add(job)
+        db.session.flush()
+        _materialize_job(job)
         db.session.commit()
+        _job_changed(job)
         return jsonify({"job_id": job.id}), 201
 
     @app.route("/apply_job", methods=["POST"])
@@ -837,73 +1608,116 @@ def create_app():
         db.session.commit()
         return jsonify({"feedback_id": feedback.id}), 201
 
+    def _load_ranking(seeker):
+        """
+        Ranked match summaries without explanations, cached for the seeker; rows
+        arrive pre-sorted from the (seeker_id, match_percent, job_id) index
+        """
+        rows = (
+            db.session.query(SeekerJobMatch.match_percent, SeekerJobMatch.distance_km, Job)
+            .join(Job, SeekerJobMatch.job_id == Job.id)
+            .filter(SeekerJobMatch.seeker_id == seeker.id, Job.active.is_(True))
+            .order_by(SeekerJobMatch.match_percent.desc(), SeekerJobMatch.job_id)
+            .all()
+        )
+        ranking = [
+            _match_to_dict(match_percent, distance_km, job)
+            for match_percent, distance_km, job in rows
+        ]
+        match_cache.put(seeker.id, ranking, seeker.latitude, seeker.longitude, seeker.max_distance_km)
+        return ranking
+
     @app.route("/match_jobs/<int:seeker_id>", methods=["GET"])
     def match_jobs(seeker_id):
         start_time = time.time()
         seeker = Seeker.query.get_or_404(seeker_id)
-        jobs = Job.query.filter_by(active=True).all()
-        matches = []
+        limit = request.args.get("limit", app.config["MATCH_PAGE_SIZE"], type=int)
+        limit = max(1, min(limit, app.config["MATCH_MAX_PAGE_SIZE"]))
+        offset = max(0, request.args.get("offset", 0, type=int))
+        min_percent = request.args.get("min_percent", type=float)
+        explain = request.args.get("explain", "true").lower() not in ("false", "0")
+
+        def _page(ranking):
+            eligible = ranking
+            if min_percent is not None:
+                eligible = list(takewhile(lambda item: item["match_percent"] >= min_percent, ranking))
+            return eligible, [dict(item) for item in eligible[offset:offset + limit]]
+
+        def _details(matches):
+            return dict(
+                SeekerJobMatch.query.filter(
+                    SeekerJobMatch.seeker_id == seeker.id,
+                    SeekerJobMatch.job_id.in_([item["job_id"] for item in matches]),
+                ).with_entities(SeekerJobMatch.job_id, SeekerJobMatch.details)
+            )
+
+        ranking = match_cache.get(seeker.id)
+        if ranking is None:
+            ranking = _load_ranking(seeker)
+        eligible, matches = _page(ranking)
+
+        # Explanations are only loaded for the returned page
+        if explain and matches:
+            details_by_job = _details(matches)
+            if any(item["job_id"] not in details_by_job for item in matches):
+                # The cached ranking lists a match row that has since been rewritten
+                # (or this process missed the invalidation); rebuild it from the table
+                match_cache.invalidate_seeker(seeker.id)
+                ranking = _load_ranking(seeker)
+                eligible, matches = _page(ranking)
+                details_by_job = _details(matches) if matches else {}
+            matches = [item for item in matches if item["job_id"] in details_by_job]
+            for item in matches:
+                item["details"] = json.loads(details_by_job[item["job_id"]])
         
+        # Read before notifying, whose commit expires the seeker
+        seeker_location = {"latitude": seeker.latitude, "longitude": seeker.longitude}
+        search_seeker_id = seeker.id
+
         # Optional: notify about high matches
         notify_matches = request.args.get("notify", "false").lower() == "true"
-
-        for job in jobs:
-            distance_km = haversine_km(seeker.latitude, seeker.longitude, job.latitude, job.longitude)
-            score, details = match_score(seeker, job, distance_km)
-            matches.append(
-                {
-                    "job_id": job.id,
-                    "title": job.title,
-                    "wage": job.wage,
-                    "duration": job.duration,
-                    "work_hours": job.work_hours,
-                    "distance_km": details["distance_km"],
-                    "match_percent": round(score * 100, 1),
-                    "latitude": job.latitude,
-                    "longitude": job.longitude,
-                    "details": details,
-                }
-            )
-
-        matches.sort(key=lambda item: item["match_percent"], reverse=True)
         
         # Send notifications for top matches if requested
-        if notify_matches and matches:
-            seeker_user = User.query.filter_by(seeker_id=seeker.id).first()
-            top_matches = [m for m in matches[:3] if m["match_percent"] >= 70]  # Top 3 with >70% match
+        if notify_matches and ranking:
+            top_matches = [m for m in ranking[:3] if m["match_percent"] >= 70]  # Top 3 with >70% match
+            seeker_user_id = (
+                User.query.filter_by(seeker_id=search_seeker_id).with_entities(User.id).limit(1).scalar()
+                if top_matches
+                else None
+            )
             
-            if seeker_user and top_matches:
-                for match in top_matches:
-                    job = Job.query.get(match["job_id"])
-                    if job:
-                        content = get_match_notification(
-                            job_title=job.title,
+            if seeker_user_id and top_matches:
+                _send_notifications([
+                    {
+                        "user_id": seeker_user_id,
+                        "notification_type": "match",
+                        "content_dict": get_match_notification(
+                            job_title=match["title"],
                             match_score=match["match_percent"],
                             distance_km=match["distance_km"]
-                        )
-                        _send_notification(
-                            user_id=seeker_user.id,
-                            notification_type="match",
-                            content_dict=content,
-                            related_job_id=job.id,
-                            priority="normal"
-                        )
+                        ),
+                        "related_job_id": match["job_id"],
+                        "priority": "normal",
+                    }
+                    for match in top_matches
+                ])
 
         duration_ms = int((time.time() - start_time) * 1000)
-        db.session.add(SearchLog(seeker_id=seeker.id, duration_ms=duration_ms))
-        db.session.commit()
+        search_log.record(search_seeker_id, duration_ms)
 
+        next_offset = offset + limit if offset + limit < len(eligible) else None
         return jsonify({
             "matches": matches,
-            "seeker_location": {
-                "latitude": seeker.latitude,
-                "longitude": seeker.longitude
-            }
+            "total": len(eligible),
+            "next_offset": next_offset,
+            "seeker_location": seeker_location,
         })
 
     @app.route("/all_jobs", methods=["GET"])
     def all_jobs():
-        jobs = Job.query.filter_by(active=True).all()
+        jobs, next_cursor = _paginate(
+            Job.query.filter_by(active=True), Job.created_at, Job.id, lambda row: (row.created_at, row.id)
+        )
         results = []
         for job in jobs:
             distance_km, estimated_days, estimated_hours = _sample_job_metrics(job)
@@ -924,7 +1738,7 @@ def create_app():
                     "estimated_hours": estimated_hours,
                 }
             )
-        return jsonify({"jobs": results})
+        return jsonify({"jobs": results, "next_cursor": next_cursor})
 
     @app.route("/filter_jobs", methods=["GET"])
     def filter_jobs():
@@ -938,36 +1752,33 @@ def create_app():
         jobs = Job.query.filter_by(active=True)
         if min_wage is not None:
             jobs = jobs.filter(Job.wage >= min_wage)
+        if duration:
+            jobs = jobs.filter(db.func.normalize_token(Job.duration) == _normalize_token(duration))
         if gender_friendly is not None:
             jobs = jobs.filter(Job.gender_friendly == bool(gender_friendly))
         if pwd_accessible is not None:
             jobs = jobs.filter(Job.pwd_accessible == bool(pwd_accessible))
-        if query:
+        match_query = fts_query(query) if query and app.config["JOB_SEARCH_FTS"] else None
+        if query and not match_query:
             like_term = f"%{query}%"
             jobs = jobs.filter(
                 or_(Job.title.ilike(like_term), Job.required_skills.ilike(like_term))
             )
 
-        results = []
         lat = request.args.get("lat", type=float)
         lon = request.args.get("lon", type=float)
-        def _normalize(value):
-            return "".join(char for char in value.lower() if char.isalnum())
-
-        target_duration = _normalize(duration) if duration else None
+        jobs, sort_column = _with_distance(jobs, lat, lon, max_distance)
+        if match_query:
+            # Full-text matches come back best-ranked first, paged by offset
+            # because rank moves whenever any job is written
+            matches = job_fts_matches(match_query)
+            jobs = jobs.join(matches, matches.c.job_id == Job.id)
+            rows, next_cursor = _paginate_offset(jobs, matches.c.rank, Job.id)
+        else:
+            rows, next_cursor = _paginate_jobs(jobs, sort_column)
 
-        for job in jobs.all():
-            if target_duration:
-                job_duration = _normalize(job.duration or "")
-                if job_duration != target_duration:
-                    continue
-            distance_km = None
-            if max_distance is not None and lat is not None and lon is not None:
-                distance_km = haversine_km(lat, lon, job.latitude, job.longitude)
-                if distance_km > max_distance:
-                    continue
-            elif lat is not None and lon is not None:
-                distance_km = haversine_km(lat, lon, job.latitude, job.longitude)
+        results = []
+        for job, distance_km in rows:
             results.append(
                 {
                     "job_id": job.id,
@@ -981,28 +1792,17 @@ def create_app():
                     "distance_km": round(distance_km, 1) if distance_km is not None else None,
                 }
             )
-        return jsonify({"jobs": results})
+        return jsonify({"jobs": results, "next_cursor": next_cursor})
 
     @app.route("/admin_metrics", methods=["GET"])
     def admin_metrics():
-        total_placements = Feedback.query.filter_by(completed=True, payment_confirmed=True).count()
-        total_seekers = Seeker.query.count()
-        women_placements = (
-            Feedback.query.join(Application, Feedback.application_id == Application.id)
-            .join(Seeker, Application.seeker_id == Seeker.id)
-            .filter(Feedback.completed.is_(True), Feedback.payment_confirmed.is_(True))
-            .filter(Seeker.gender.ilike("female"))
-            .count()
-        )
-        pwd_placements = (
-            Feedback.query.join(Application, Feedback.application_id == Application.id)
-            .join(Seeker, Application.seeker_id == Seeker.id)
-            .filter(Feedback.completed.is_(True), Feedback.payment_confirmed.is_(True))
-            .filter(Seeker.pwd_status.is_(True))
-            .count()
-        )
-        avg_match = db.session.query(db.func.avg(Application.match_score)).scalar() or 0
-        avg_search_time = db.session.query(db.func.avg(SearchLog.duration_ms)).scalar() or 0
+        totals = metrics.totals()
+        total_placements = totals["placements"]
+        total_seekers = totals["seekers"]
+        women_placements = totals["women_placements"]
+        pwd_placements = totals["pwd_placements"]
+        avg_match = totals["match_score_sum"] / totals["applications"] if totals["applications"] else 0
+        avg_search_time = totals["search_ms_sum"] / totals["searches"] if totals["searches"] else 0
 
         return jsonify(
             {
@@ -1019,6 +1819,179 @@ def create_app():
             }
         )
 
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        """Prometheus text exposition of request, SQL and delivery telemetry"""
+        # Checked by token rather than client address: behind a reverse proxy every
+        # client appears to come from the proxy
+        token = app.config["METRICS_TOKEN"]
+        supplied = request.headers.get("Authorization", "")
+        if not token or not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            return _json_error("Forbidden", 403)
+        return Response(telemetry.render(), mimetype="text/plain; version=0.0.4")
+
+    @app.route("/admin_metrics/profile", methods=["GET"])
+    @_require_roles("admin")
+    def profile_captures():
+        return jsonify(profiler.captures())
+
+    @app.route("/admin_metrics/profile", methods=["POST"])
+    @_require_roles("admin")
+    def start_profile():
+        """
+        Start a CPU (cProfile) or memory (tracemalloc) capture
+        
+        Body: kind (cpu|memory), and either route plus requests to capture the
+        next N requests to that route, or seconds to capture every request (to
+        route, if given) for a fixed window. seconds also bounds a route capture.
+        """
+        payload = request.get_json(force=True)
+        kind = payload.get("kind", "cpu")
+        if kind not in PROFILE_KINDS:
+            return _json_error(f"kind must be one of {', '.join(PROFILE_KINDS)}")
+        route = payload.get("route")
+        if route is not None and route not in {rule.rule for rule in app.url_map.iter_rules()}:
+            return _json_error(f"Unknown route: {route}")
+        max_seconds = app.config["PROFILE_MAX_SECONDS"]
+        try:
+            requests_to_capture = int(payload["requests"]) if payload.get("requests") is not None else None
+            seconds = float(payload.get("seconds", max_seconds if requests_to_capture else 60))
+        except (TypeError, ValueError):
+            return _json_error("requests and seconds must be numbers")
+        if requests_to_capture is not None:
+            if route is None:
+                return _json_error("requests needs a route")
+            if not 0 < requests_to_capture <= app.config["PROFILE_MAX_REQUESTS"]:
+                return _json_error(f"requests must be between 1 and {app.config['PROFILE_MAX_REQUESTS']}")
+        if not 0 < seconds <= max_seconds:
+            return _json_error(f"seconds must be between 0 and {max_seconds}")
+        try:
+            capture = profiler.start(kind, route=route, max_requests=requests_to_capture, seconds=seconds)
+        except RuntimeError as e:
+            return _json_error(str(e), 409)
+        return jsonify(capture), 201
+
+    @app.route("/admin_metrics/profile", methods=["DELETE"])
+    @_require_roles("admin")
+    def stop_profile():
+        capture = profiler.stop()
+        if capture is None:
+            return _json_error("No profile capture is running", 404)
+        return jsonify(capture)
+
+    @app.route("/admin_metrics/profile/<int:capture_id>", methods=["GET"])
+    @_require_roles("admin")
+    def download_profile(capture_id):
+        """Download a capture's .pstats or allocation report; ?format=text renders CPU stats"""
+        capture, path = profiler.result(capture_id)
+        if capture is None:
+            return _json_error("Profile capture not found", 404)
+        if capture["kind"] == "cpu" and request.args.get("format") == "text":
+            sort = request.args.get("sort", "cumulative")
+            if sort not in ("cumulative", "tottime", "calls"):
+                return _json_error("sort must be cumulative, tottime or calls")
+            return Response(profiler.cpu_summary(path, sort), mimetype="text/plain")
+        return send_file(path, as_attachment=True, download_name=capture["file"])
+
+    @app.route("/admin_metrics/match_cache", methods=["GET"])
+    @_require_roles("admin")
+    def match_cache_stats():
+        return jsonify(match_cache.stats())
+
+    @app.route("/admin_metrics/notification_queue", methods=["GET"])
+    @_require_roles("admin")
+    def notification_queue_stats():
+        return jsonify(outbox.stats())
+
+    @app.route("/admin_metrics/search_log", methods=["GET"])
+    @_require_roles("admin")
+    def search_log_stats():
+        return jsonify(search_log.stats())
+
+    @app.route("/admin_metrics/timeseries", methods=["GET"])
+    @_require_roles("admin")
+    def metrics_timeseries():
+        """
+        Dashboard metrics per hour or day, answered from the rollup table
+        
+        Query params: bucket (hour|day, default day), from/to (ISO dates or
+        datetimes, default the last 30 days or 48 hours), region (grid cell
+        "row:col", default all regions). Buckets without activity are zero-filled.
+        """
+        bucket = request.args.get("bucket", DAY)
+        if bucket not in BUCKETS:
+            return _json_error("bucket must be 'hour' or 'day'")
+        step = timedelta(hours=1) if bucket == HOUR else timedelta(days=1)
+        try:
+            end = datetime.fromisoformat(request.args["to"]) if request.args.get("to") else datetime.utcnow()
+            start = (
+                datetime.fromisoformat(request.args["from"])
+                if request.args.get("from")
+                else end - (timedelta(hours=48) if bucket == HOUR else timedelta(days=30))
+            )
+        except ValueError:
+            return _json_error("from and to must be ISO 8601 dates")
+        # Rollup buckets are naive UTC, like every stored timestamp
+        start, end = [
+            value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+            for value in (start, end)
+        ]
+        if start >= end:
+            return _json_error("from must be before to")
+        first = bucket_start(start, bucket)
+        if (end - first) / step > app.config["METRICS_MAX_BUCKETS"]:
+            return _json_error(f"Range spans more than {app.config['METRICS_MAX_BUCKETS']} buckets")
+
+        counters = metrics.series(bucket, start, end, region=request.args.get("region"))
+        series = []
+        current = first
+        while current < end:
+            row = counters.get(current, {})
+            placements = row.get("placements") or 0
+            applications = row.get("applications") or 0
+            searches = row.get("searches") or 0
+            series.append({
+                "period_start": current.isoformat(),
+                "new_seekers": row.get("seekers") or 0,
+                "applications": applications,
+                "average_match_score": round(row["match_score_sum"] / applications, 1)
+                if applications
+                else 0,
+                "placements": placements,
+                "women_placements": row.get("women_placements") or 0,
+                "pwd_placements": row.get("pwd_placements") or 0,
+                "percent_women_placed": round(row["women_placements"] / placements * 100, 1)
+                if placements
+                else 0,
+                "percent_pwd_placed": round(row["pwd_placements"] / placements * 100, 1)
+                if placements
+                else 0,
+                "searches": searches,
+                "average_search_time_ms": int(row["search_ms_sum"] / searches) if searches else 0,
+            })
+            current += step
+        return jsonify({
+            "bucket": bucket,
+            "from": first.isoformat(),
+            "to": end.isoformat(),
+            "region": request.args.get("region"),
+            "series": series,
+        })
+
+    @app.route("/admin_metrics/reconcile", methods=["POST"])
+    @_require_roles("admin")
+    def reconcile_metrics():
+        """Rebuild the dashboard rollup now and report the corrections"""
+        return jsonify({"corrections": metrics.reconcile()})
+
+    @app.route("/admin_metrics/retention", methods=["GET", "POST"])
+    @_require_roles("admin")
+    def retention_status():
+        """Show the last retention run, or run retention now with POST"""
+        if request.method == "POST":
+            return jsonify(retention.run())
+        return jsonify({"last_run": retention.last_run})
+
     # ============ NOTIFICATION ENDPOINTS ============
 
     @app.route("/notifications", methods=["GET"])
@@ -1027,18 +2000,66 @@ def create_app():
         """Get notifications for the current user"""
         user_id = get_jwt_identity()
         unread_only = request.args.get("unread_only", "false").lower() == "true"
-        limit = request.args.get("limit", 50, type=int)
         
         query = Notification.query.filter_by(user_id=user_id)
         if unread_only:
             query = query.filter_by(is_read=False)
         
-        notifications = query.order_by(Notification.created_at.desc()).limit(limit).all()
+        notifications, next_cursor = _paginate(
+            query,
+            Notification.created_at,
+            Notification.id,
+            lambda row: (row.created_at, row.id),
+            descending=True,
+        )
         return jsonify({
             "notifications": [_notification_to_dict(n) for n in notifications],
-            "unread_count": Notification.query.filter_by(user_id=user_id, is_read=False).count()
+            "next_cursor": next_cursor,
+            "unread_count": _unread_count(user_id)
         })
 
+    @app.route("/notifications/stream", methods=["GET"])
+    @jwt_required(locations=["headers", "query_string"])
+    def stream_notifications():
+        """
+        Push notifications to the current user as Server-Sent Events
+        
+        EventSource cannot send headers, so the token may be passed as ?jwt=.
+        Sends an 'unread' event with the unread count on connect and after every
+        change, and a 'notification' event for each new notification.
+        """
+        user_id = int(get_jwt_identity())
+        events = notification_broker.subscribe(user_id)
+        unread_count = _unread_count(user_id)
+        keepalive = app.config["NOTIFICATION_STREAM_KEEPALIVE"]
+
+        def generate():
+            try:
+                yield sse_event("unread", {"unread_count": unread_count})
+                while True:
+                    try:
+                        batch = [events.get(timeout=keepalive)]
+                    except Empty:
+                        yield ": keepalive\n\n"
+                        continue
+                    # Several queued changes need only one fresh count
+                    while not events.empty():
+                        batch.append(events.get_nowait())
+                    for event_name, payload in batch:
+                        if event_name == "notification":
+                            yield sse_event("notification", payload)
+                    with app.app_context():
+                        count = _unread_count(user_id)
+                    yield sse_event("unread", {"unread_count": count})
+            finally:
+                notification_broker.unsubscribe(user_id, events)
+
+        return Response(
+            generate(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     @app.route("/notifications/<int:notification_id>/read", methods=["PATCH"])
     @jwt_required()
     def mark_notification_read(notification_id):
@@ -1046,6 +2067,7 @@ def create_app():
         user_id = get_jwt_identity()
         notification = Notification.query.filter_by(id=notification_id, user_id=user_id).first_or_404()
         notification.is_read = True
+        _notification_changed(notification.user_id)
         db.session.commit()
         return jsonify(_notification_to_dict(notification))
 
@@ -1055,6 +2077,8 @@ def create_app():
         """Mark all notifications as read for current user"""
         user_id = get_jwt_identity()
         Notification.query.filter_by(user_id=user_id, is_read=False).update({"is_read": True})
+        User.query.filter_by(id=user_id).update({"unread_notifications": 0})
+        _notification_changed(int(user_id))
         db.session.commit()
         return jsonify({"message": "All notifications marked as read"})
 
@@ -1065,6 +2089,7 @@ def create_app():
         user_id = get_jwt_identity()
         notification = Notification.query.filter_by(id=notification_id, user_id=user_id).first_or_404()
         db.session.delete(notification)
+        _notification_changed(notification.user_id)
         db.session.commit()
         return jsonify({"message": "Notification deleted"})
 
@@ -1262,10 +2287,16 @@ def create_app():
         for job_data in jobs_payload:
             provider = providers[job_data.pop("provider_name")]
             job = Job(provider_id=provider.id, **job_data)
+            _encode_skills(job, job.required_skills)
             db.session.add(job)
             created.append(job)
 
+        db.session.flush()
+        for job in created:
+            _materialize_job(job)
         db.session.commit()
+        for job in created:
+            _job_changed(job)
         return jsonify({"created_jobs": [job.id for job in created]}), 201
 
     return app
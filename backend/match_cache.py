@@ -0,0 +1,84 @@
+"""
+Match result cache for JobMatch
+Keeps the ranked match list of recently active seekers in a bounded LRU so
+dashboard refreshes skip re-ranking until a relevant seeker or job changes
+"""
+from collections import OrderedDict
+from threading import Lock
+
+from matching import haversine_km
+
+
+class MatchCache:
+    """LRU of ranked match lists keyed by seeker ID, with hit/miss counters"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, seeker_id):
+        with self._lock:
+            entry = self._entries.get(seeker_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(seeker_id)
+            self.hits += 1
+            return entry["matches"]
+
+    def put(self, seeker_id, matches, latitude, longitude, radius_km):
+        """Store a seeker's ranked matches along with the area they were computed for"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[seeker_id] = {
+                "matches": matches,
+                "latitude": latitude,
+                "longitude": longitude,
+                "radius_km": radius_km,
+            }
+            self._entries.move_to_end(seeker_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_seeker(self, seeker_id):
+        with self._lock:
+            if self._entries.pop(seeker_id, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_location(self, latitude, longitude):
+        """Drop every entry whose search radius covers the given point"""
+        with self._lock:
+            stale = [
+                seeker_id
+                for seeker_id, entry in self._entries.items()
+                if haversine_km(entry["latitude"], entry["longitude"], latitude, longitude)
+                <= entry["radius_km"]
+            ]
+            for seeker_id in stale:
+                del self._entries[seeker_id]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -1,4 +1,5 @@
 import math
+from threading import Lock
 
 
 WEIGHTS = {
@@ -31,10 +32,7 @@ def _normalize_list(raw_text):
     return [item.strip().lower() for item in raw_text.split(",") if item.strip()]
 
 
-def skill_match_percent(seeker_skills, job_skills):
-    """Calculate skill match percentage with support for partial matches and word stems."""
-    seeker_set = set(_normalize_list(seeker_skills))
-    job_set = set(_normalize_list(job_skills))
+def _skill_overlap_percent(seeker_set, job_set):
     if not seeker_set or not job_set:
         return 0.0
     
@@ -59,6 +57,13 @@ def skill_match_percent(seeker_skills, job_skills):
     return (len(matched_job_skills) / len(job_set)) * 100.0
 
 
+def skill_match_percent(seeker_skills, job_skills):
+    """Calculate skill match percentage with support for partial matches and word stems."""
+    seeker_set = set(_normalize_list(seeker_skills))
+    job_set = set(_normalize_list(job_skills))
+    return _skill_overlap_percent(seeker_set, job_set)
+
+
 def distance_score(distance_km, max_distance_km):
     if distance_km > max_distance_km:
         return 0.0
@@ -96,3 +101,246 @@ def match_score(seeker, job, distance_km):
         "pwd_friendly": job.pwd_accessible,
         "accommodation_available": job.accommodation_available,
     }
+
+
+def haversine_km_many(lat, lon, latitudes, longitudes):
+    """Distances from one point to a column of points, identical to haversine_km."""
+    radius = 6371.0
+    phi1 = math.radians(lat)
+    cos_phi1 = math.cos(phi1)
+    distances = []
+    for lat2, lon2 in zip(latitudes, longitudes):
+        phi2 = math.radians(lat2)
+        delta_phi = math.radians(lat2 - lat)
+        delta_lambda = math.radians(lon2 - lon)
+        a = (
+            math.sin(delta_phi / 2) ** 2
+            + cos_phi1 * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+        )
+        distances.append(radius * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)))
+    return distances
+
+
+def match_scores_batch(seeker, jobs, distances=None, skill_percents=None):
+    """Score one seeker against many jobs at once.
+
+    Jobs are unpacked into column lists and every factor is computed column-wise,
+    with the seeker's fields read once and each distinct skill string parsed once.
+    ``skill_percents`` may map job IDs to precomputed skill match percentages
+    (e.g. from ``SkillIndex``); jobs missing from it score 0 on skills.
+    Returns a list of ``(score, details)`` tuples in job order, identical to
+    calling ``match_score`` per job.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+
+    wages = [job.wage for job in jobs]
+    durations = [job.duration for job in jobs]
+    work_hours = [job.work_hours for job in jobs]
+    pwd_accessible = [job.pwd_accessible for job in jobs]
+    accommodation = [job.accommodation_available for job in jobs]
+    if distances is None:
+        distances = haversine_km_many(
+            seeker.latitude,
+            seeker.longitude,
+            [job.latitude for job in jobs],
+            [job.longitude for job in jobs],
+        )
+
+    if skill_percents is not None:
+        skills_pcts = [skill_percents.get(job.id, 0.0) for job in jobs]
+    else:
+        seeker_set = set(_normalize_list(seeker.skills))
+        skill_cache = {}
+        skills_pcts = []
+        for raw_skills in (job.required_skills for job in jobs):
+            if raw_skills not in skill_cache:
+                skill_cache[raw_skills] = _skill_overlap_percent(
+                    seeker_set, set(_normalize_list(raw_skills))
+                )
+            skills_pcts.append(skill_cache[raw_skills])
+
+    max_distance_km = seeker.max_distance_km
+    expected_wage = seeker.expected_wage
+    needs_pwd = bool(seeker.pwd_status)
+    needs_accommodation = bool(seeker.need_accommodation)
+
+    distance_scores = [distance_score(distance_km, max_distance_km) for distance_km in distances]
+    wage_scores = [wage_score(expected_wage, wage) for wage in wages]
+    duration_matches = [1.0 if seeker.duration_pref == duration else 0.0 for duration in durations]
+    work_hours_matches = [1.0 if seeker.work_hours == hours else 0.0 for hours in work_hours]
+    pwd_matches = [1.0 if (not needs_pwd or accessible) else 0.0 for accessible in pwd_accessible]
+    accommodation_matches = [
+        1.0 if (not needs_accommodation or available) else 0.0 for available in accommodation
+    ]
+
+    results = []
+    for index in range(len(jobs)):
+        weighted = (
+            WEIGHTS["skills"] * (skills_pcts[index] / 100.0)
+            + WEIGHTS["distance"] * distance_scores[index]
+            + WEIGHTS["wage"] * wage_scores[index]
+            + WEIGHTS["duration"] * duration_matches[index]
+            + WEIGHTS["work_hours"] * work_hours_matches[index]
+            + WEIGHTS["pwd"] * pwd_matches[index]
+            + WEIGHTS["accommodation"] * accommodation_matches[index]
+        )
+        results.append(
+            (
+                max(0.0, min(1.0, weighted)),
+                {
+                    "skill_match": round(skills_pcts[index], 1),
+                    "distance_km": round(distances[index], 1),
+                    "wage_compatible": wages[index] >= expected_wage,
+                    "duration_match": duration_matches[index] == 1.0,
+                    "work_hours_match": work_hours_matches[index] == 1.0,
+                    "pwd_friendly": pwd_accessible[index],
+                    "accommodation_available": accommodation[index],
+                },
+            )
+        )
+    return results
+
+
+def unique_skills(raw_text):
+    """Normalized skills in first-seen order with duplicates dropped"""
+    return list(dict.fromkeys(_normalize_list(raw_text or "")))
+
+
+def format_skill_ids(skill_ids):
+    return ",".join(str(skill_id) for skill_id in skill_ids)
+
+
+def parse_skill_ids(text):
+    return [int(item) for item in (text or "").split(",") if item]
+
+
+def skill_map(raw_text, skill_ids_text):
+    """Pair canonical skill IDs with their normalized names: {skill_id: name}"""
+    return dict(zip(parse_skill_ids(skill_ids_text), unique_skills(raw_text)))
+
+
+def _popcount(value):
+    return bin(value).count("1")
+
+
+class SkillIndex:
+    """Inverted index from canonical skill IDs and 4-char prefixes to active job IDs.
+
+    Each job is held as a bitset over the skill vocabulary. Whether a vocabulary
+    skill matches a seeker (same rules as ``skill_match_percent``) does not depend
+    on the job, so each distinct skill is tested once per lookup, the matches are
+    OR-ed into one mask, and a job's overlap is the popcount of ``job_bits & mask``.
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._postings = {}
+        self._prefixes = {}
+        self._job_bits = {}
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._job_bits)
+
+    def _discard(self, job_id):
+        bits = self._job_bits.pop(job_id, None)
+        if not bits:
+            return
+        skill_id = 0
+        while bits:
+            if bits & 1:
+                jobs = self._postings[skill_id]
+                jobs.discard(job_id)
+                if not jobs:
+                    del self._postings[skill_id]
+                    name = self._names[skill_id]
+                    if len(name) >= 4:
+                        prefixed = self._prefixes[name[:4]]
+                        prefixed.discard(skill_id)
+                        if not prefixed:
+                            del self._prefixes[name[:4]]
+            bits >>= 1
+            skill_id += 1
+
+    def _add(self, job_id, skills):
+        bits = 0
+        for skill_id, name in skills.items():
+            self._names[skill_id] = name
+            bits |= 1 << skill_id
+            self._postings.setdefault(skill_id, set()).add(job_id)
+            if len(name) >= 4:
+                self._prefixes.setdefault(name[:4], set()).add(skill_id)
+        self._job_bits[job_id] = bits
+
+    def upsert(self, job_id, skills):
+        """Index a job from its {skill_id: name} map"""
+        with self._lock:
+            self._discard(job_id)
+            self._add(job_id, skills)
+
+    def remove(self, job_id):
+        with self._lock:
+            self._discard(job_id)
+
+    def sync(self, job):
+        """Index or drop a job depending on whether it is active"""
+        if job.active:
+            self.upsert(job.id, skill_map(job.required_skills, job.skill_ids))
+        else:
+            self.remove(job.id)
+
+    def rebuild(self, rows):
+        """Replace the index contents with (job_id, required_skills, skill_ids) rows"""
+        with self._lock:
+            self._postings = {}
+            self._prefixes = {}
+            self._job_bits = {}
+            for job_id, required_skills, skill_ids in rows:
+                self._add(job_id, skill_map(required_skills, skill_ids))
+
+    def _matched_ids(self, seeker_skills):
+        matched = {skill_id for skill_id in seeker_skills if skill_id in self._postings}
+        seeker_names = set(seeker_skills.values())
+        for seeker_skill in seeker_names:
+            if len(seeker_skill) >= 4:
+                matched.update(self._prefixes.get(seeker_skill[:4], ()))
+        for skill_id in self._postings:
+            if skill_id in matched:
+                continue
+            job_skill = self._names[skill_id]
+            if any(
+                job_skill in seeker_skill or seeker_skill in job_skill
+                for seeker_skill in seeker_names
+            ):
+                matched.add(skill_id)
+        return matched
+
+    def skill_percents(self, seeker_skills, job_ids=None):
+        """
+        Skill match percentage for every indexed job sharing a skill with the seeker
+
+        Args:
+            seeker_skills: The seeker's {skill_id: name} map (see ``skill_map``)
+            job_ids: Optional collection restricting the candidate jobs
+
+        Returns:
+            dict: job_id -> skill match percent (jobs with no overlap are omitted)
+        """
+        if not seeker_skills:
+            return {}
+        with self._lock:
+            matched = self._matched_ids(seeker_skills)
+            mask = 0
+            candidates = set()
+            for skill_id in matched:
+                mask |= 1 << skill_id
+                candidates.update(self._postings[skill_id])
+            if job_ids is not None:
+                candidates.intersection_update(job_ids)
+            results = {}
+            for job_id in candidates:
+                bits = self._job_bits[job_id]
+                results[job_id] = (_popcount(bits & mask) / _popcount(bits)) * 100.0
+            return results
@@ -14,6 +14,7 @@ class Seeker(db.Model):
     gender = db.Column(db.String(20), nullable=False)
     pwd_status = db.Column(db.Boolean, default=False)
     skills = db.Column(db.Text, nullable=False)
+    skill_ids = db.Column(db.Text, nullable=True)  # comma separated Skill IDs
     expected_wage = db.Column(db.Integer, nullable=False)
     max_distance_km = db.Column(db.Float, default=50.0)
     work_hours = db.Column(db.String(50), nullable=False)
@@ -24,6 +25,19 @@ class Seeker(db.Model):
     longitude = db.Column(db.Float, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Finding seekers whose radius covers a job
+        db.Index("ix_seeker_lat_lon", "latitude", "longitude"),
+        db.Index("ix_seeker_max_distance_km", "max_distance_km"),
+        db.Index("ix_seeker_created_at_id", "created_at", "id"),
+    )
+
+
+class Skill(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), unique=True, nullable=False)  # normalized spelling
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 
 class Provider(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -35,12 +49,15 @@ class Provider(db.Model):
     longitude = db.Column(db.Float, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (db.Index("ix_provider_created_at_id", "created_at", "id"),)
+
 
 class Job(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     provider_id = db.Column(db.Integer, db.ForeignKey("provider.id"), nullable=False)
     title = db.Column(db.String(160), nullable=False)
     required_skills = db.Column(db.Text, nullable=False)
+    skill_ids = db.Column(db.Text, nullable=True)  # comma separated Skill IDs
     wage = db.Column(db.Integer, nullable=False)
     work_hours = db.Column(db.String(50), nullable=False)
     duration = db.Column(db.String(30), nullable=False)
@@ -54,6 +71,29 @@ class Job(db.Model):
     active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Bounding-box prefilter for radius searches
+        db.Index("ix_job_active_lat_lon", "active", "latitude", "longitude"),
+        db.Index("ix_job_created_at_id", "created_at", "id"),
+    )
+
+
+class SeekerJobMatch(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    seeker_id = db.Column(db.Integer, db.ForeignKey("seeker.id"), nullable=False)
+    job_id = db.Column(db.Integer, db.ForeignKey("job.id"), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    match_percent = db.Column(db.Float, nullable=False)
+    distance_km = db.Column(db.Float, nullable=False)
+    details = db.Column(db.Text, nullable=False)  # JSON encoded match explanation
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("seeker_id", "job_id", name="uq_seeker_job_match"),
+        db.Index("ix_seeker_job_match_ranking", "seeker_id", "match_percent", "job_id"),
+        db.Index("ix_seeker_job_match_job", "job_id"),
+    )
+
 
 class Application(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -63,6 +103,8 @@ class Application(db.Model):
     status = db.Column(db.String(30), default="applied")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (db.Index("ix_application_created_at_id", "created_at", "id"),)
+
 
 class Feedback(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -80,6 +122,28 @@ class SearchLog(db.Model):
     duration_ms = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (db.Index("ix_search_log_created_at", "created_at"),)
+
+
+class MetricRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), nullable=False)  # total, hour, day
+    period_start = db.Column(db.DateTime, nullable=False)
+    region = db.Column(db.String(40), nullable=False, default="")  # seeker grid cell "row:col"
+    seekers = db.Column(db.Integer, nullable=False, default=0)
+    applications = db.Column(db.Integer, nullable=False, default=0)
+    match_score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    placements = db.Column(db.Integer, nullable=False, default=0)
+    women_placements = db.Column(db.Integer, nullable=False, default=0)
+    pwd_placements = db.Column(db.Integer, nullable=False, default=0)
+    searches = db.Column(db.Integer, nullable=False, default=0)
+    search_ms_sum = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("period", "period_start", "region", name="uq_metric_rollup_bucket"),
+    )
+
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -88,6 +152,8 @@ class User(db.Model):
     role = db.Column(db.String(30), nullable=False)
     seeker_id = db.Column(db.Integer, db.ForeignKey("seeker.id"), nullable=True)
     provider_id = db.Column(db.Integer, db.ForeignKey("provider.id"), nullable=True)
+    # Maintained on every notification insert, read and delete; see app.py
+    unread_notifications = db.Column(db.Integer, default=0, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
@@ -105,6 +171,14 @@ class Notification(db.Model):
     sent_sms = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Unread filter and newest-first pages of one user's notifications
+        db.Index("ix_notification_user_unread_created", "user_id", "is_read", "created_at"),
+        db.Index("ix_notification_user_created_id", "user_id", "created_at", "id"),
+        db.Index("ix_notification_dedupe", "user_id", "notification_type", "related_job_id"),
+        db.Index("ix_notification_created_at", "created_at"),
+    )
+
 
 class NotificationPreference(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -118,3 +192,28 @@ class NotificationPreference(db.Model):
     notify_on_deadline = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class NotificationOutbox(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    notification_id = db.Column(db.Integer, db.ForeignKey("notification.id"), nullable=False)
+    channel = db.Column(db.String(10), nullable=False)  # email, sms
+    recipient = db.Column(db.String(160), nullable=False)
+    subject = db.Column(db.String(200), nullable=True)
+    body = db.Column(db.Text, nullable=False)
+    html_body = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), default="pending")  # pending, sending, sent, failed
+    priority = db.Column(db.String(20), default="normal")  # copied from the notification
+    digest_summary = db.Column(db.Text, nullable=True)  # set on deliveries that may be merged into a digest
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, nullable=True)  # when a dispatcher marked it sending
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_notification_outbox_due", "status", "next_attempt_at"),
+        db.Index("ix_notification_outbox_recipient", "channel", "recipient", "status"),
+        db.Index("ix_notification_outbox_created_at", "created_at"),
+    )
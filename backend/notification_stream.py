@@ -0,0 +1,50 @@
+"""
+Notification push for JobMatch
+Fans committed notification changes out to each user's open Server-Sent Events
+streams so the bell updates without polling /notifications
+"""
+import json
+from queue import Full, Queue
+from threading import Lock
+
+
+class NotificationBroker:
+    """In-process publish/subscribe of notification events keyed by user ID"""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = Lock()
+
+    def subscribe(self, user_id):
+        events = Queue(self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(events)
+        return events
+
+    def unsubscribe(self, user_id, events):
+        with self._lock:
+            streams = self._subscribers.get(user_id)
+            if streams is not None:
+                streams.discard(events)
+                if not streams:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, event, data=None):
+        """Queue an event for every open stream of a user; slow streams drop events"""
+        with self._lock:
+            streams = list(self._subscribers.get(user_id, ()))
+        for events in streams:
+            try:
+                events.put_nowait((event, data))
+            except Full:
+                pass
+
+    def connections(self):
+        with self._lock:
+            return sum(len(streams) for streams in self._subscribers.values())
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -2,14 +2,25 @@
 Notification Service for JobMatch
 Handles Email and SMS notifications for rural job seekers
 """
+import heapq
+import itertools
 import os
-from typing import Optional
+import smtplib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from queue import Empty, LifoQueue
+from typing import List, Optional, Tuple
 from flask_mail import Mail, Message
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 
 
 # Email configuration
 mail = None
+smtp_pool = None
 
 
 def init_mail(app):
@@ -22,20 +33,372 @@ def init_mail(app):
     app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD', '')
     app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@jobmatch.com')
     mail = Mail(app)
+    global smtp_pool
+    smtp_pool = SMTPConnectionPool(mail, size=int(os.environ.get('MAIL_POOL_SIZE', 4)))
     return mail
 
 
+class SMTPConnectionPool:
+    """
+    Long-lived SMTP connections shared across sends
+    
+    Each connection is used by one thread at a time and kept open between
+    messages, so the TLS handshake and login happen once per connection
+    instead of once per email. Connections idle longer than idle_check
+    seconds are probed with NOOP before reuse and replaced if the server
+    dropped them.
+    """
+
+    # Server reply meaning it is closing the connection; other replies are final
+    SERVICE_CLOSING = 421
+
+    def __init__(self, mail_ext, size=4, idle_check=30.0):
+        self.mail = mail_ext
+        self.size = size
+        self.idle_check = idle_check
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _open(self):
+        connection = self.mail.connect()
+        connection.__enter__()
+        connection.last_used = time.monotonic()
+        return connection
+
+    def _close(self, connection):
+        try:
+            connection.__exit__(None, None, None)
+        except Exception:
+            pass
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            connection = self._idle.get_nowait()
+        except Empty:
+            return self._open()
+        if connection.host and time.monotonic() - connection.last_used > self.idle_check:
+            try:
+                connection.host.noop()
+            except Exception:
+                self._close(connection)
+                return self._open()
+        return connection
+
+    def _release(self, connection):
+        if connection is not None:
+            connection.last_used = time.monotonic()
+            self._idle.put(connection)
+        self._slots.release()
+
+    def _connection_lost(self, error):
+        """True if the error means the connection dropped, so resending on a new one is safe"""
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code == self.SERVICE_CLOSING
+        # SMTPException subclasses OSError; only plain socket errors are connection failures
+        return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+    def _send_one(self, connection, message):
+        """Send on the given connection, reconnecting once if it dropped; returns the live connection"""
+        try:
+            connection.send(message)
+            return connection
+        except Exception as e:
+            if not self._connection_lost(e):
+                raise
+            self._close(connection)
+            connection = self._open()
+            connection.send(message)
+            return connection
+
+    def send_many(self, messages: List[Message]) -> List[bool]:
+        """Send messages over one pooled connection; returns one success flag per message"""
+        results = []
+        connection = None
+        try:
+            connection = self._acquire()
+            for message in messages:
+                try:
+                    connection = self._send_one(connection, message)
+                    results.append(True)
+                except Exception as e:
+                    print(f"Failed to send email to {', '.join(message.recipients)}: {str(e)}")
+                    results.append(False)
+                    # The connection is in an unknown state; start the next message fresh
+                    self._close(connection)
+                    connection = None
+                    connection = self._open()
+        except Exception as e:
+            print(f"Failed to open SMTP connection: {str(e)}")
+            results.extend([False] * (len(messages) - len(results)))
+        finally:
+            self._release(connection)
+        return results
+
+    def close_all(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except Empty:
+                return
+
+
+def _build_message(to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> Message:
+    msg = Message(subject=subject, recipients=[to_email])
+    msg.body = body
+    if html_body:
+        msg.html = html_body
+    return msg
+
+
 # Twilio configuration
 TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID', '')
 TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN', '')
+# One number, or several comma separated numbers to spread load across
 TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER', '')
+# Override the Twilio API host, e.g. http://localhost:4010 for a local fake
+TWILIO_API_BASE_URL = os.environ.get('TWILIO_API_BASE_URL', '')
+# Sustained messages per second allowed from each sender number; the outbox's
+# SMS budget defaults to this times the number of sender numbers
+SMS_RATE_PER_SECOND = float(os.environ.get('SMS_RATE_PER_SECOND', 1))
+SMS_MAX_WORKERS = int(os.environ.get('SMS_MAX_WORKERS', 8))
+
+TWILIO_API_HOST = "https://api.twilio.com"
+
+
+@lru_cache(maxsize=65536)
+def normalize_phone(phone: str) -> Optional[str]:
+    """
+    Normalize a phone number to E.164, assuming India (+91) without a country code
+    
+    Returns:
+        str: Normalized number, or None if it is too short to be valid
+    """
+    # Clean up phone number - remove spaces, dashes, parentheses
+    phone = (phone or "").strip().replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
+    
+    # Ensure phone number is in E.164 format
+    if not phone.startswith('+'):
+        # Assume Indian number if no country code
+        phone = f"+91{phone.lstrip('0')}"
+        
+    # Validate phone number format (minimum 10 digits after country code)
+    phone_digits = ''.join(filter(str.isdigit, phone))
+    if len(phone_digits) < 10:
+        return None
+    return phone
+
+
+class _PooledTwilioHttpClient(TwilioHttpClient):
+    """Twilio HTTP client on one keep-alive session, optionally pointed at another host"""
+
+    def __init__(self, base_url="", pool_size=10):
+        super().__init__(pool_connections=True)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, url, *args, **kwargs):
+        if self.base_url and url.startswith(TWILIO_API_HOST):
+            url = self.base_url + url[len(TWILIO_API_HOST):]
+        return super().request(method, url, *args, **kwargs)
+
+
+class _TokenBucket:
+    """Non-blocking token bucket: rate tokens per second, up to burst saved"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token if one is left; returns 0, or the seconds until one will be"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def reserve(self):
+        """Take the next token, even one not yet earned; returns the seconds until it may be used"""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+
+class SmsDeferred(Exception):
+    """Every sender number is at its rate limit; try again after retry_after seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"SMS rate limit reached, retry in {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+
+class SmsSender:
+    """
+    Process-wide Twilio sender
+    
+    Holds one Twilio client on a pooled keep-alive HTTP session, rotates across
+    the configured sender numbers and rate limits each number with its own
+    token bucket. No thread sleeps on a limit: send() raises SmsDeferred when
+    every number is out of tokens, and send_many() schedules each message for
+    the time its number's token is due.
+    """
+
+    def __init__(self, account_sid, auth_token, from_numbers, rate_per_second=1.0,
+                 max_workers=8, base_url=""):
+        self.from_numbers = list(from_numbers)
+        self.client = Client(
+            account_sid,
+            auth_token,
+            http_client=_PooledTwilioHttpClient(base_url, pool_size=max_workers),
+        )
+        self._limits = {number: _TokenBucket(rate_per_second) for number in self.from_numbers}
+        self._next_number = itertools.cycle(self.from_numbers)
+        self._number_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sms-sender")
+        # (due, sequence, future, from_number, to_phone, message) waiting for their token
+        self._scheduled = []
+        self._sequence = itertools.count()
+        self._schedule_ready = threading.Condition()
+        self._scheduler = None
+
+    def _take_number(self):
+        """A sender number with a token left, trying them in rotation"""
+        with self._number_lock:
+            wait = None
+            for _ in self.from_numbers:
+                number = next(self._next_number)
+                delay = self._limits[number].try_acquire()
+                if not delay:
+                    return number
+                wait = delay if wait is None else min(wait, delay)
+        raise SmsDeferred(wait)
+
+    def _reserve_number(self):
+        """The next sender number in rotation, and the seconds until the token reserved on it is due"""
+        with self._number_lock:
+            number = next(self._next_number)
+            return number, self._limits[number].reserve()
+
+    def _create(self, from_number, to_phone, message):
+        try:
+            sms_response = self.client.messages.create(
+                body=message,
+                from_=from_number,
+                to=to_phone
+            )
+            print(f"SMS sent successfully: {sms_response.sid}")
+            return True
+        except Exception as e:
+            print(f"Failed to send SMS: {str(e)}")
+            return False
+
+    def send(self, to_phone: str, message: str) -> bool:
+        """
+        Send one SMS now
+
+        Raises:
+            SmsDeferred: If every sender number is at its rate limit
+        """
+        normalized = normalize_phone(to_phone)
+        if not normalized:
+            print(f"Invalid phone number (too short): {to_phone}")
+            return False
+        return self._create(self._take_number(), normalized, message)
+
+    def send_many(self, messages: List[Tuple[str, str]]) -> List[bool]:
+        """
+        Send (to_phone, message) pairs concurrently, each when its sender number
+        has a token; returns one success flag per message
+        """
+        futures = []
+        for to_phone, message in messages:
+            normalized = normalize_phone(to_phone)
+            if not normalized:
+                print(f"Invalid phone number (too short): {to_phone}")
+                future = Future()
+                future.set_result(False)
+            else:
+                number, delay = self._reserve_number()
+                if delay:
+                    future = self._schedule(delay, number, normalized, message)
+                else:
+                    future = self._executor.submit(self._create, number, normalized, message)
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _schedule(self, delay, from_number, to_phone, message):
+        future = Future()
+        with self._schedule_ready:
+            heapq.heappush(
+                self._scheduled,
+                (time.monotonic() + delay, next(self._sequence), future, from_number, to_phone, message),
+            )
+            if self._scheduler is None:
+                self._scheduler = threading.Thread(
+                    target=self._release_scheduled, name="sms-pacer", daemon=True
+                )
+                self._scheduler.start()
+            self._schedule_ready.notify()
+        return future
+
+    def _release_scheduled(self):
+        """Hand scheduled messages to the send pool as their tokens come due"""
+        while True:
+            with self._schedule_ready:
+                while not self._scheduled or self._scheduled[0][0] > time.monotonic():
+                    timeout = self._scheduled[0][0] - time.monotonic() if self._scheduled else None
+                    self._schedule_ready.wait(timeout)
+                _, _, future, from_number, to_phone, message = heapq.heappop(self._scheduled)
+            sent = self._executor.submit(self._create, from_number, to_phone, message)
+            sent.add_done_callback(lambda done, future=future: future.set_result(done.result()))
+
+
+_sms_sender = None
+_sms_sender_lock = threading.Lock()
+
+
+def get_sms_sender() -> Optional[SmsSender]:
+    """Get the shared SMS sender if Twilio is configured"""
+    global _sms_sender
+    if _sms_sender is None and TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_PHONE_NUMBER:
+        with _sms_sender_lock:
+            if _sms_sender is None:
+                _sms_sender = SmsSender(
+                    TWILIO_ACCOUNT_SID,
+                    TWILIO_AUTH_TOKEN,
+                    [number.strip() for number in TWILIO_PHONE_NUMBER.split(',') if number.strip()],
+                    rate_per_second=SMS_RATE_PER_SECOND,
+                    max_workers=SMS_MAX_WORKERS,
+                    base_url=TWILIO_API_BASE_URL,
+                )
+    return _sms_sender
+
+
+def sms_rate_budget() -> float:
+    """Messages per second the configured sender numbers allow together"""
+    numbers = [number for number in TWILIO_PHONE_NUMBER.split(',') if number.strip()]
+    return SMS_RATE_PER_SECOND * max(1, len(numbers))
 
 
 def get_twilio_client() -> Optional[Client]:
     """Get Twilio client if credentials are configured"""
-    if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
-        return Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-    return None
+    sender = get_sms_sender()
+    return sender.client if sender else None
 
 
 def send_email(to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> bool:
@@ -57,17 +420,34 @@ def send_email(to_email: str, subject: str, body: str, html_body: Optional[str]
             print(f"To: {to_email}\nSubject: {subject}\nBody: {body}")
             return False
             
-        msg = Message(subject=subject, recipients=[to_email])
-        msg.body = body
-        if html_body:
-            msg.html = html_body
-        mail.send(msg)
-        return True
+        return smtp_pool.send_many([_build_message(to_email, subject, body, html_body)])[0]
     except Exception as e:
         print(f"Failed to send email: {str(e)}")
         return False
 
 
+def send_bulk_email(messages: List[Tuple[str, str, str, Optional[str]]]) -> List[bool]:
+    """
+    Send many emails over a single pooled SMTP connection
+    
+    Args:
+        messages: List of (to_email, subject, body, html_body) tuples
+        
+    Returns:
+        list: One bool per message, True if sent successfully
+    """
+    if not messages:
+        return []
+    if not mail:
+        print(f"Email not configured. Would send {len(messages)} emails")
+        return [False] * len(messages)
+    try:
+        return smtp_pool.send_many([_build_message(*message) for message in messages])
+    except Exception as e:
+        print(f"Failed to send emails: {str(e)}")
+        return [False] * len(messages)
+
+
 def send_sms(to_phone: str, message: str) -> bool:
     """
     Send SMS notification via Twilio
@@ -78,40 +458,47 @@ def send_sms(to_phone: str, message: str) -> bool:
         
     Returns:
         bool: True if sent successfully, False otherwise
+        
+    Raises:
+        SmsDeferred: If every sender number is at its rate limit
     """
     try:
-        client = get_twilio_client()
-        if not client or not TWILIO_PHONE_NUMBER:
+        sender = get_sms_sender()
+        if not sender:
             print("SMS not configured. Would send SMS:")
             print(f"To: {to_phone}\nMessage: {message}")
             return False
-        
-        # Clean up phone number - remove spaces, dashes, parentheses
-        to_phone = to_phone.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-        
-        # Ensure phone number is in E.164 format
-        if not to_phone.startswith('+'):
-            # Assume Indian number if no country code
-            to_phone = f"+91{to_phone.lstrip('0')}"
-            
-        # Validate phone number format (minimum 10 digits after country code)
-        phone_digits = ''.join(filter(str.isdigit, to_phone))
-        if len(phone_digits) < 10:
-            print(f"Invalid phone number (too short): {to_phone}")
-            return False
-            
-        sms_response = client.messages.create(
-            body=message,
-            from_=TWILIO_PHONE_NUMBER,
-            to=to_phone
-        )
-        print(f"SMS sent successfully: {sms_response.sid}")
-        return True
+        return sender.send(to_phone, message)
+    except SmsDeferred:
+        raise
     except Exception as e:
         print(f"Failed to send SMS: {str(e)}")
         return False
 
 
+def send_bulk_sms(messages: List[Tuple[str, str]]) -> List[bool]:
+    """
+    Send many SMS concurrently, up to SMS_MAX_WORKERS in flight and rate limited per sender number
+    
+    Each sender number is paced to SMS_RATE_PER_SECOND: messages beyond its
+    tokens are scheduled for when they come due, so a large burst takes a
+    while to return.
+    
+    Args:
+        messages: List of (to_phone, message) tuples
+        
+    Returns:
+        list: One bool per message, True if sent successfully
+    """
+    if not messages:
+        return []
+    sender = get_sms_sender()
+    if not sender:
+        print(f"SMS not configured. Would send {len(messages)} SMS")
+        return [False] * len(messages)
+    return sender.send_many(messages)
+
+
 def format_sms_for_rural(title: str, message: str, max_length: int = 160) -> str:
     """
     Format SMS message for rural users with limited data
@@ -139,6 +526,10 @@ def format_sms_for_rural(title: str, message: str, max_length: int = 160) -> str
     return title[:max_length-3] + "..."
 
 
+# Notification types that are buffered per user and channel and sent as one digest
+DIGEST_TYPES = ("match", "new_job")
+
+
 # Notification templates
 def get_match_notification(job_title: str, match_score: float, distance_km: float) -> dict:
     """Generate notification content for new job match"""
@@ -155,7 +546,8 @@ def get_match_notification(job_title: str, match_score: float, distance_km: floa
         </ul>
         <p>Login to your JobMatch account to view details and apply.</p>
         <p>Don't wait - good opportunities go fast!</p>
-        """
+        """,
+        "summary": f"{job_title} ({match_score:.0f}%, {distance_km:.1f} km)"
     }
 
 
@@ -235,5 +627,28 @@ def get_new_job_notification(job_title: str, wage: int, location: str) -> dict:
             <li><strong>Location:</strong> {location}</li>
         </ul>
         <p>Login to view full details and apply.</p>
+        """,
+        "summary": f"{job_title} (₹{wage}/day, {location})"
+    }
+
+
+def get_digest_notification(entries: List[dict]) -> dict:
+    """
+    Generate one notification that combines several match/new job notifications
+    
+    Args:
+        entries: Content dicts from get_match_notification/get_new_job_notification
+        
+    Returns:
+        dict: 'title', 'message' and 'email_html' for the digest
+    """
+    summaries = "; ".join(entry["summary"] for entry in entries)
+    sections = "<hr>".join(entry.get("email_html") or f"<p>{entry['message']}</p>" for entry in entries)
+    return {
+        "title": f"{len(entries)} New Jobs For You",
+        "message": f"{summaries}. Login to apply now!",
+        "email_html": f"""
+        <h2>Your JobMatch Updates</h2>
+        {sections}
         """
     }
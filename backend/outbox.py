@@ -0,0 +1,413 @@
+"""
+Notification outbox for JobMatch
+Email and SMS deliveries are written to the NotificationOutbox table in the
+request's transaction and sent later by a pool of background workers, with
+retries and exponential backoff, so requests never wait on SMTP or Twilio
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, or_
+
+from models import Notification, NotificationOutbox, db
+from notifications import (
+    SmsDeferred,
+    format_sms_for_rural,
+    get_digest_notification,
+    send_bulk_email,
+    send_sms,
+)
+from scheduler import PRIORITIES, DeliveryScheduler
+
+
+# Priorities claimed even when the scheduler backlog is full
+EXPEDITED_PRIORITIES = ("urgent", "high")
+
+
+class OutboxDispatcher:
+    """Polls the outbox for due deliveries and feeds them through a priority scheduler to workers"""
+
+    def __init__(
+        self,
+        app,
+        workers=4,
+        poll_interval=2.0,
+        batch_size=50,
+        max_attempts=5,
+        backoff_base=30.0,
+        backoff_max=3600.0,
+        priority_weights=None,
+        channel_budgets=None,
+        max_backlog=200,
+        max_expedited_backlog=100,
+        digest_window=300.0,
+        digest_max=10,
+        claim_timeout=900.0,
+        email_batch_size=20,
+        on_delivery=None,
+    ):
+        self.app = app
+        # Called with (channel, result, seconds) after every provider hand-off
+        self.on_delivery = on_delivery
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_backlog = max_backlog
+        # Urgent/high deliveries claimed past a full backlog, so they cannot pile
+        # up in memory faster than the channel budgets drain them
+        self.max_expedited_backlog = max_expedited_backlog
+        self.digest_window = digest_window
+        self.digest_max = digest_max
+        # Deliveries left sending longer than this belong to a dispatcher that died
+        self.claim_timeout = claim_timeout
+        self._last_recovery = 0.0
+        # Email deliveries a worker sends together over one pooled SMTP connection
+        self.email_batch_size = email_batch_size
+        self.scheduler = DeliveryScheduler(priority_weights, channel_budgets)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._workers = []
+        self._backlog_full = False
+        self._thread = None
+
+    def enqueue(self, notification, channel, recipient, body, subject=None, html_body=None,
+                digest_summary=None):
+        """
+        Add a delivery to the current session; it is sent after the caller commits
+
+        Deliveries with a digest_summary are held for the digest window and sent
+        together with the recipient's other held deliveries on the same channel.
+        """
+        coalesce = bool(digest_summary) and self.digest_window > 0
+        delivery = NotificationOutbox(
+            notification_id=notification.id,
+            channel=channel,
+            recipient=recipient,
+            subject=subject,
+            body=body,
+            html_body=html_body,
+            priority=notification.priority or "normal",
+            digest_summary=digest_summary if coalesce else None,
+            next_attempt_at=datetime.utcnow() + timedelta(seconds=self.digest_window)
+            if coalesce
+            else datetime.utcnow(),
+        )
+        db.session.add(delivery)
+        return delivery
+
+    def wake(self):
+        """Tell the poller new deliveries were committed"""
+        self._wake.set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="outbox-poller", daemon=True)
+        self._thread.start()
+        for number in range(self.workers):
+            worker = threading.Thread(
+                target=self._work, name=f"outbox-worker-{number}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.scheduler.close()
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def stats(self):
+        return {"backlog": len(self.scheduler), "queued": self.scheduler.depths()}
+
+    def _requeue_stale(self):
+        """
+        Return deliveries stuck in sending past claim_timeout to pending
+
+        Other live processes (the reloader's parent, other workers) may still be
+        sending their fresh claims, so only claims older than the timeout are touched.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.claim_timeout)
+        with self.app.app_context():
+            try:
+                requeued = NotificationOutbox.query.filter(
+                    NotificationOutbox.status == "sending",
+                    or_(NotificationOutbox.claimed_at < cutoff, NotificationOutbox.claimed_at.is_(None)),
+                ).update({"status": "pending", "claimed_at": None}, synchronize_session=False)
+                db.session.commit()
+                return requeued
+            finally:
+                db.session.remove()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if time.monotonic() - self._last_recovery >= min(60.0, self.claim_timeout):
+                self._last_recovery = time.monotonic()
+                try:
+                    self._requeue_stale()
+                except Exception as e:
+                    print(f"Outbox stale claim recovery failed: {str(e)}")
+            try:
+                claimed = self._claim_due()
+            except Exception as e:
+                print(f"Outbox poll failed: {str(e)}")
+                claimed = []
+            for delivery_ids, priority, channel in claimed:
+                self.scheduler.put((channel, delivery_ids), priority, channel)
+            if len(claimed) < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _work(self):
+        while True:
+            item = self.scheduler.get()
+            if item is None:
+                return
+            channel, delivery_ids = item
+            groups = [delivery_ids]
+            if channel == "email" and self.email_batch_size > 1:
+                groups += [ids for _, ids in self.scheduler.take_ready(channel, self.email_batch_size - 1)]
+            self._deliver(channel, groups)
+            if self._backlog_full:
+                # A backlog slot just freed up for bulk deliveries left in the table
+                self._wake.set()
+
+    def _claim_due(self):
+        """
+        Mark due deliveries as sending, most urgent first
+
+        Bulk priorities only fill the free scheduler backlog; urgent and high
+        deliveries may also use max_expedited_backlog more slots, so they can
+        overtake queued bulk traffic.
+
+        A held digest delivery also claims the recipient's other held deliveries
+        on that channel, so they go out as one message.
+
+        Returns:
+            list: (delivery_ids, priority, channel) tuples
+        """
+        queued = len(self.scheduler)
+        room = self.max_backlog - queued
+        expedited_room = self.max_backlog + self.max_expedited_backlog - queued
+        self._backlog_full = room <= 0
+        if expedited_room <= 0:
+            return []
+        priority_rank = case(
+            {priority: rank for rank, priority in enumerate(PRIORITIES)},
+            value=NotificationOutbox.priority,
+            else_=PRIORITIES.index("normal"),
+        )
+        with self.app.app_context():
+            try:
+                query = NotificationOutbox.query.filter(
+                    NotificationOutbox.status == "pending",
+                    NotificationOutbox.next_attempt_at <= datetime.utcnow(),
+                )
+                if room <= 0:
+                    query = query.filter(NotificationOutbox.priority.in_(EXPEDITED_PRIORITIES))
+                due = (
+                    query.order_by(
+                        priority_rank, NotificationOutbox.next_attempt_at, NotificationOutbox.id
+                    )
+                    .with_entities(
+                        NotificationOutbox.id,
+                        NotificationOutbox.priority,
+                        NotificationOutbox.channel,
+                        NotificationOutbox.recipient,
+                        NotificationOutbox.digest_summary,
+                    )
+                    .limit(self.batch_size)
+                    .all()
+                )
+                claimed = []
+                now = datetime.utcnow()
+                for delivery_id, priority, channel, recipient, digest_summary in due:
+                    if priority not in EXPEDITED_PRIORITIES:
+                        if room <= 0:
+                            self._backlog_full = True
+                            continue
+                    elif expedited_room <= 0:
+                        continue
+                    room -= 1
+                    expedited_room -= 1
+                    updated = NotificationOutbox.query.filter_by(
+                        id=delivery_id, status="pending"
+                    ).update({"status": "sending", "claimed_at": now})
+                    if not updated:
+                        continue
+                    delivery_ids = [delivery_id]
+                    if digest_summary:
+                        delivery_ids += self._claim_digest(delivery_id, channel, recipient, now)
+                    claimed.append((tuple(delivery_ids), priority, channel))
+                db.session.commit()
+                return claimed
+            finally:
+                db.session.remove()
+
+    def _claim_digest(self, leader_id, channel, recipient, now):
+        """Claim the held deliveries that join leader_id's digest, whether due or not"""
+        held = (
+            NotificationOutbox.query.filter(
+                NotificationOutbox.channel == channel,
+                NotificationOutbox.recipient == recipient,
+                NotificationOutbox.status == "pending",
+                NotificationOutbox.digest_summary.isnot(None),
+                NotificationOutbox.id != leader_id,
+            )
+            .order_by(NotificationOutbox.id)
+            .with_entities(NotificationOutbox.id)
+            .limit(self.digest_max - 1)
+            .all()
+        )
+        claimed = []
+        for (delivery_id,) in held:
+            updated = NotificationOutbox.query.filter_by(
+                id=delivery_id, status="pending"
+            ).update({"status": "sending", "claimed_at": now})
+            if updated:
+                claimed.append(delivery_id)
+        return claimed
+
+    def _backoff(self, attempts):
+        return timedelta(seconds=min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1))))
+
+    def _merge(self, deliveries):
+        """Build one delivery-shaped message out of a recipient's held deliveries"""
+        digest = get_digest_notification([
+            {
+                "title": delivery.subject,
+                "message": delivery.body,
+                "email_html": delivery.html_body,
+                "summary": delivery.digest_summary,
+            }
+            for delivery in deliveries
+        ])
+        first = deliveries[0]
+        body = digest["message"]
+        if first.channel == "sms":
+            body = format_sms_for_rural(digest["title"], digest["message"])
+        return NotificationOutbox(
+            channel=first.channel,
+            recipient=first.recipient,
+            subject=digest["title"],
+            body=body,
+            html_body=digest["email_html"],
+        )
+
+    def _send_all(self, channel, messages):
+        """
+        Send delivery-shaped messages; returns one (sent, error) pair per message
+
+        sent is None for an SMS deferred by the sender numbers' rate limit, and
+        error is then the SmsDeferred saying when to try again
+        """
+        if channel == "email":
+            try:
+                flags = send_bulk_email([
+                    (message.recipient, message.subject, message.body, message.html_body)
+                    for message in messages
+                ])
+            except Exception as e:
+                return [(False, str(e))] * len(messages)
+            return [(sent, None if sent else "email provider rejected the message") for sent in flags]
+        results = []
+        for message in messages:
+            try:
+                if channel != "sms":
+                    raise ValueError(f"Unknown delivery channel: {channel}")
+                sent = send_sms(message.recipient, message.body)
+                results.append((sent, None if sent else "sms provider rejected the message"))
+            except SmsDeferred as e:
+                results.append((None, e))
+            except Exception as e:
+                results.append((False, str(e)))
+        return results
+
+    def _defer(self, deliveries, retry_after):
+        """Put deliveries back without counting an attempt, due when the rate limit allows"""
+        for delivery in deliveries:
+            delivery.status = "pending"
+            delivery.claimed_at = None
+            delivery.next_attempt_at = datetime.utcnow() + timedelta(seconds=retry_after)
+
+    def _record(self, deliveries, sent, error):
+        for delivery in deliveries:
+            delivery.attempts = (delivery.attempts or 0) + 1
+            delivery.claimed_at = None
+            if sent:
+                delivery.status = "sent"
+                delivery.last_error = None
+            elif delivery.attempts >= self.max_attempts:
+                delivery.status = "failed"
+                delivery.last_error = error
+            else:
+                delivery.status = "pending"
+                delivery.last_error = error
+                delivery.next_attempt_at = datetime.utcnow() + self._backoff(delivery.attempts)
+
+    def _deliver(self, channel, groups):
+        """Send each group of delivery IDs as one message (a digest if it has several)"""
+        delivery_ids = [delivery_id for ids in groups for delivery_id in ids]
+        with self.app.app_context():
+            try:
+                # Restart the claim clock now that a worker has the deliveries, so
+                # time spent queued in the scheduler never makes them look stale;
+                # any _requeue_stale already returned to pending are skipped below
+                NotificationOutbox.query.filter(
+                    NotificationOutbox.id.in_(delivery_ids), NotificationOutbox.status == "sending"
+                ).update({"claimed_at": datetime.utcnow()}, synchronize_session=False)
+                db.session.commit()
+                rows = {
+                    delivery.id: delivery
+                    for delivery in NotificationOutbox.query.filter(
+                        NotificationOutbox.id.in_(delivery_ids),
+                        NotificationOutbox.status == "sending",
+                    )
+                }
+                batches = []
+                for ids in groups:
+                    deliveries = [rows[delivery_id] for delivery_id in sorted(ids) if delivery_id in rows]
+                    if deliveries:
+                        batches.append(deliveries)
+                if not batches:
+                    return
+                messages = [
+                    deliveries[0] if len(deliveries) == 1 else self._merge(deliveries)
+                    for deliveries in batches
+                ]
+                started = time.perf_counter()
+                results = self._send_all(channel, messages)
+                elapsed = (time.perf_counter() - started) / len(messages)
+
+                sent_ids = []
+                for deliveries, (sent, error) in zip(batches, results):
+                    if sent is None:
+                        if self.on_delivery is not None:
+                            self.on_delivery(channel, "deferred", elapsed)
+                        self._defer(deliveries, error.retry_after)
+                        continue
+                    if self.on_delivery is not None:
+                        self.on_delivery(channel, "sent" if sent else "error", elapsed)
+                    self._record(deliveries, sent, error)
+                    if sent:
+                        sent_ids.extend(delivery.notification_id for delivery in deliveries)
+                if sent_ids:
+                    field = "sent_email" if channel == "email" else "sent_sms"
+                    Notification.query.filter(Notification.id.in_(sent_ids)).update(
+                        {field: True}, synchronize_session=False
+                    )
+                db.session.commit()
+            except Exception as e:
+                print(f"Outbox delivery {[list(ids) for ids in groups]} failed: {str(e)}")
+                db.session.rollback()
+            finally:
+                db.session.remove()
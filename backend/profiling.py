@@ -0,0 +1,235 @@
+"""
+On-demand profiling for JobMatch
+Captures cProfile statistics or a tracemalloc allocation report for the next N
+requests to one route, or for every request in a time window, and keeps the
+results on disk for download
+"""
+import cProfile
+import io
+import os
+import pstats
+import threading
+import tracemalloc
+from datetime import datetime
+
+
+KINDS = ("cpu", "memory")
+
+
+class ProfileCapture:
+    """One capture: what it covers, how far it got and where its result was written"""
+
+    def __init__(self, capture_id, kind, route, max_requests, seconds):
+        self.capture_id = capture_id
+        self.kind = kind
+        self.route = route
+        self.max_requests = max_requests
+        self.seconds = seconds
+        self.requests = 0
+        self.started_at = datetime.utcnow()
+        self.finished_at = None
+        self.path = None
+        self.stats = None
+        self.baseline = None
+        self.started_tracing = False
+        self.timer = None
+
+    def covers(self, route):
+        return self.finished_at is None and (self.route is None or self.route == route)
+
+    def to_dict(self):
+        return {
+            "capture_id": self.capture_id,
+            "kind": self.kind,
+            "route": self.route,
+            "max_requests": self.max_requests,
+            "seconds": self.seconds,
+            "requests": self.requests,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "file": os.path.basename(self.path) if self.path else None,
+        }
+
+
+class Profiler:
+    """Runs at most one capture at a time, fed by the app's request hooks"""
+
+    def __init__(self, output_dir, top=25, frames=10, keep=20):
+        self.output_dir = output_dir
+        self.top = top
+        # Stack depth recorded per allocation while tracemalloc is tracing
+        self.frames = frames
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._active = None
+        # Capture whose result is being written, outside the lock
+        self._writing = None
+        self._finished = []
+        self._next_id = 1
+
+    def start(self, kind, route=None, max_requests=None, seconds=60.0):
+        """
+        Begin a capture of the next max_requests requests to route, or of every
+        request (to route, if given) until seconds have passed
+
+        Raises:
+            ValueError: For an unknown kind
+            RuntimeError: If a capture is already running
+        """
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        with self._lock:
+            if self._active is not None or self._writing is not None:
+                raise RuntimeError("A profile capture is already running")
+            capture = ProfileCapture(self._next_id, kind, route, max_requests, seconds)
+            self._next_id += 1
+            if kind == "memory":
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(self.frames)
+                    capture.started_tracing = True
+                tracemalloc.reset_peak()
+                capture.baseline = tracemalloc.take_snapshot()
+            capture.timer = threading.Timer(seconds, self._expire, args=(capture,))
+            capture.timer.daemon = True
+            capture.timer.start()
+            self._active = capture
+        return capture.to_dict()
+
+    def stop(self):
+        """Finish the running capture early; returns it, or None if nothing was running"""
+        with self._lock:
+            capture = self._active
+            if capture is None:
+                return None
+            self._detach(capture)
+        self._finish(capture)
+        return capture.to_dict()
+
+    def _expire(self, capture):
+        with self._lock:
+            if self._active is not capture:
+                return
+            self._detach(capture)
+        self._finish(capture)
+
+    def before_request(self, route):
+        """Start profiling this request if the running capture covers its route"""
+        capture = self._active
+        if capture is None or not capture.covers(route):
+            return None
+        if capture.kind == "memory":
+            return capture, None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler already owns this interpreter
+            return None
+        return capture, profile
+
+    def after_request(self, token):
+        if token is None:
+            return
+        capture, profile = token
+        if profile is not None:
+            profile.disable()
+        with self._lock:
+            if self._active is not capture:
+                return
+            if profile is not None:
+                if capture.stats is None:
+                    capture.stats = pstats.Stats(profile)
+                else:
+                    capture.stats.add(profile)
+            capture.requests += 1
+            if not capture.max_requests or capture.requests < capture.max_requests:
+                return
+            self._detach(capture)
+        self._finish(capture)
+
+    def _detach(self, capture):
+        """Stop feeding the capture; caller holds the lock"""
+        capture.timer.cancel()
+        capture.finished_at = datetime.utcnow()
+        self._active = None
+        self._writing = capture
+
+    def _finish(self, capture):
+        """Write a detached capture's result without holding the lock"""
+        stamp = capture.started_at.strftime("%Y%m%dT%H%M%S")
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            if capture.kind == "cpu":
+                if capture.stats is not None:
+                    capture.path = os.path.join(self.output_dir, f"cpu-{capture.capture_id}-{stamp}.pstats")
+                    capture.stats.dump_stats(capture.path)
+            else:
+                capture.path = os.path.join(self.output_dir, f"memory-{capture.capture_id}-{stamp}.txt")
+                with open(capture.path, "w", encoding="utf-8") as report:
+                    report.write(self._memory_report(capture))
+        except Exception as e:
+            print(f"Writing profile capture {capture.capture_id} failed: {str(e)}")
+            capture.path = None
+        finally:
+            if capture.started_tracing:
+                tracemalloc.stop()
+            capture.stats = None
+            capture.baseline = None
+
+        with self._lock:
+            self._writing = None
+            self._finished.append(capture)
+            excess = max(0, len(self._finished) - self.keep)
+            expired, self._finished = self._finished[:excess], self._finished[excess:]
+        for old in expired:
+            if old.path and os.path.exists(old.path):
+                os.remove(old.path)
+
+    def _memory_report(self, capture):
+        current, peak = tracemalloc.get_traced_memory()
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+        snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+        baseline = capture.baseline.filter_traces(ignore)
+        scope = f"route {capture.route}" if capture.route else "all routes"
+        lines = [
+            f"Memory capture {capture.capture_id}: {capture.requests} requests to {scope}",
+            f"Window: {capture.started_at.isoformat()} to {capture.finished_at.isoformat()}",
+            f"Traced memory: {current / 1024:.1f} KiB current, {peak / 1024:.1f} KiB peak (process-wide)",
+            "",
+            f"Top {self.top} allocation sites by growth since the capture started:",
+        ]
+        lines.extend(f"  {stat}" for stat in snapshot.compare_to(baseline, "lineno")[: self.top])
+        lines.extend(["", f"Top {self.top} live allocation sites:"])
+        lines.extend(f"  {stat}" for stat in snapshot.statistics("lineno")[: self.top])
+        largest = snapshot.statistics("traceback")[:3]
+        if largest:
+            lines.extend(["", "Tracebacks of the three largest sites:"])
+            for stat in largest:
+                lines.append(f"  {stat.count} blocks, {stat.size / 1024:.1f} KiB")
+                lines.extend(f"    {line}" for line in stat.traceback.format())
+        return "\n".join(lines) + "\n"
+
+    def captures(self):
+        with self._lock:
+            current = self._active or self._writing
+            active = current.to_dict() if current is not None else None
+            finished = [capture.to_dict() for capture in reversed(self._finished)]
+        return {"active": active, "finished": finished}
+
+    def result(self, capture_id):
+        """The finished capture with this ID and its result file, or (None, None)"""
+        with self._lock:
+            for capture in self._finished:
+                if capture.capture_id == capture_id and capture.path:
+                    return capture.to_dict(), capture.path
+        return None, None
+
+    def cpu_summary(self, path, sort="cumulative"):
+        """Render a pstats file as the usual text table of the top functions"""
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).strip_dirs().sort_stats(sort).print_stats(self.top)
+        return output.getvalue()
@@ -0,0 +1,205 @@
+"""
+Data retention for JobMatch
+Archives rows past their TTL to gzipped NDJSON, deletes them in small batches
+so writers are never locked out for long, and returns the freed pages to the
+filesystem with incremental VACUUM
+"""
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, text
+
+from models import db
+
+
+class RetentionPolicy:
+    """Rows of a model older than ttl_days, optionally narrowed by extra SQL conditions"""
+
+    def __init__(self, model, ttl_days, conditions=(), on_delete=None):
+        self.model = model
+        self.ttl_days = ttl_days
+        self.conditions = list(conditions)
+        # Called with the batch's row dicts inside its transaction, before the delete
+        self.on_delete = on_delete
+
+    @property
+    def table(self):
+        return self.model.__table__
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    raise TypeError(f"Cannot archive value of type {type(value).__name__}")
+
+
+def enable_incremental_vacuum(engine, convert=False):
+    """
+    Switch the database to incremental auto-vacuum
+
+    A new, empty database picks the mode up as soon as its tables are created.
+    An existing file only does so after one full VACUUM, which rewrites the whole
+    database and blocks writers, so that only happens when convert is set (the
+    enable-incremental-vacuum CLI command) and never during app startup.
+
+    Returns:
+        bool: True if the database is (now) in incremental mode
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        mode = connection.execute(text("PRAGMA auto_vacuum")).scalar()
+        if mode == 2:
+            return True
+        connection.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        # Takes effect at once on a file without tables
+        if connection.execute(text("PRAGMA auto_vacuum")).scalar() == 2:
+            return True
+        if not convert:
+            return False
+        print("Converting database to incremental auto-vacuum (one-time full VACUUM)")
+        connection.execute(text("VACUUM"))
+        return connection.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+
+
+class RetentionManager:
+    """Runs retention policies on demand or periodically from a background thread"""
+
+    def __init__(
+        self,
+        app,
+        policies,
+        archive_dir,
+        batch_size=500,
+        batch_pause=0.05,
+        vacuum_pages=1000,
+    ):
+        self.app = app
+        self.policies = policies
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.vacuum_pages = vacuum_pages
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = None
+
+    def start(self, interval):
+        if self._thread is not None or interval <= 0:
+            return
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval,), name="retention", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.run()
+            except Exception as e:
+                print(f"Retention run failed: {str(e)}")
+
+    def run(self):
+        """
+        Apply every policy, then vacuum freed pages
+
+        Returns:
+            dict: Rows archived and deleted per table, pages vacuumed and archive files
+        """
+        with self._run_lock, self.app.app_context():
+            try:
+                started = datetime.utcnow()
+                stamp = started.strftime("%Y%m%dT%H%M%S")
+                summary = {"started_at": started.isoformat(), "deleted": {}, "archives": []}
+                for policy in self.policies:
+                    deleted, archive_path = self._apply(policy, started, stamp)
+                    summary["deleted"][policy.table.name] = deleted
+                    if archive_path:
+                        summary["archives"].append(archive_path)
+                summary["vacuumed_pages"] = self._vacuum()
+                summary["finished_at"] = datetime.utcnow().isoformat()
+                self.last_run = summary
+                return summary
+            finally:
+                db.session.remove()
+
+    def _apply(self, policy, now, stamp):
+        table = policy.table
+        cutoff = now - timedelta(days=policy.ttl_days)
+        expired = select(table.c.id).where(table.c.created_at < cutoff, *policy.conditions)
+        archive_path = os.path.join(self.archive_dir, f"{table.name}-{stamp}.ndjson.gz")
+        archive = archive_file = None
+        deleted = 0
+        try:
+            while True:
+                ids = db.session.execute(
+                    expired.order_by(table.c.created_at).limit(self.batch_size)
+                ).scalars().all()
+                if not ids:
+                    break
+                rows = [
+                    dict(row._mapping)
+                    for row in db.session.execute(
+                        select(table).where(table.c.id.in_(ids)).order_by(table.c.id)
+                    )
+                ]
+                if archive is None:
+                    os.makedirs(self.archive_dir, exist_ok=True)
+                    archive_file = open(archive_path, "ab")
+                    archive = gzip.open(archive_file, "at", encoding="utf-8")
+                for row in rows:
+                    archive.write(json.dumps(row, default=_json_value) + "\n")
+                # Archived rows must be on disk before they are deleted
+                archive.flush()
+                os.fsync(archive_file.fileno())
+
+                if policy.on_delete is not None:
+                    policy.on_delete(rows)
+                db.session.execute(delete(table).where(table.c.id.in_(ids)))
+                db.session.commit()
+                deleted += len(ids)
+
+                # Short transactions with a gap between them let request writes through
+                if len(ids) < self.batch_size:
+                    break
+                time.sleep(self.batch_pause)
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            if archive is not None:
+                # Closing the gzip stream leaves the file it wraps open
+                archive.close()
+                archive_file.close()
+        return deleted, archive_path if deleted else None
+
+    def _vacuum(self):
+        """Release free pages a chunk at a time so no single step holds the write lock long"""
+        vacuumed = 0
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            if connection.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+                return 0
+            while True:
+                free_pages = connection.execute(text("PRAGMA freelist_count")).scalar()
+                if not free_pages:
+                    break
+                pages = min(free_pages, self.vacuum_pages)
+                connection.execute(text(f"PRAGMA incremental_vacuum({int(pages)})"))
+                remaining = connection.execute(text("PRAGMA freelist_count")).scalar()
+                if remaining >= free_pages:
+                    break
+                vacuumed += free_pages - remaining
+                time.sleep(self.batch_pause)
+        return vacuumed
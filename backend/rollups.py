@@ -0,0 +1,421 @@
+"""
+Metric rollups for JobMatch
+Keeps running counters for the admin dashboard in MetricRollup: an all-time
+row plus hourly and daily rows per location grid cell. They are updated in the
+same transaction as the seekers, applications, feedback and search logs they
+summarize, and the all-time row is periodically reconciled against the source tables
+"""
+import math
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm.attributes import get_history
+
+from models import Application, Feedback, MetricRollup, SearchLog, Seeker, db
+
+
+TOTAL = "total"
+HOUR = "hour"
+DAY = "day"
+BUCKETS = (HOUR, DAY)
+EPOCH = datetime(1970, 1, 1)
+COUNTERS = (
+    "seekers",
+    "applications",
+    "match_score_sum",
+    "placements",
+    "women_placements",
+    "pwd_placements",
+    "searches",
+    "search_ms_sum",
+)
+
+
+def is_female(gender):
+    # Same test as Seeker.gender.ilike("female")
+    return (gender or "").lower() == "female"
+
+
+def is_placement(feedback):
+    return bool(feedback.completed) and bool(feedback.payment_confirmed)
+
+
+def bucket_start(when, period):
+    """Truncate a datetime to the start of its hour or day bucket"""
+    if period == HOUR:
+        return when.replace(minute=0, second=0, microsecond=0)
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _changed(obj, attribute):
+    """Return (old, new) if a flushed attribute changed value, else None"""
+    history = get_history(obj, attribute)
+    if not history.added or not history.deleted:
+        return None
+    old, new = history.deleted[0], history.added[0]
+    return None if old == new else (old, new)
+
+
+class MetricsRollup:
+    """
+    Maintains MetricRollup rows and reconciles the all-time row in the background
+
+    Bucketed rows are keyed by the seeker's grid cell when the event was
+    recorded, so they keep history that SearchLog retention has pruned.
+    """
+
+    def __init__(self, app, cell_size_deg=0.25):
+        self.app = app
+        self.cell_size = cell_size_deg
+        self._stop = threading.Event()
+        self._thread = None
+
+    def region(self, latitude, longitude):
+        """Grid cell label 'row:col' for a location, or '' if it is unknown"""
+        if latitude is None or longitude is None:
+            return ""
+        return f"{math.floor(latitude / self.cell_size)}:{math.floor(longitude / self.cell_size)}"
+
+    def _add(self, deltas, when, region, total=True, **counts):
+        when = when or datetime.utcnow()
+        if total:
+            deltas[(TOTAL, EPOCH, "")].update(counts)
+        for period in BUCKETS:
+            deltas[(period, bucket_start(when, period), region)].update(counts)
+
+    def _bump(self, connection, deltas):
+        """Upsert counter increments for each (period, period_start, region) key in one executemany"""
+        now = datetime.utcnow()
+        rows = [
+            {
+                "period": period,
+                "period_start": period_start,
+                "region": region,
+                "updated_at": now,
+                **{name: counts.get(name, 0) for name in COUNTERS},
+            }
+            for (period, period_start, region), counts in deltas.items()
+            if any(counts.values())
+        ]
+        if not rows:
+            return
+        statement = insert(MetricRollup)
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=["period", "period_start", "region"],
+                set_={
+                    **{name: getattr(MetricRollup, name) + statement.excluded[name] for name in COUNTERS},
+                    "updated_at": statement.excluded.updated_at,
+                },
+            ),
+            rows,
+        )
+
+    def _seeker_locations(self, connection, seeker_ids):
+        if not seeker_ids:
+            return {}
+        rows = connection.execute(
+            select(Seeker.id, Seeker.latitude, Seeker.longitude).where(Seeker.id.in_(seeker_ids))
+        )
+        return {seeker_id: (lat, lon) for seeker_id, lat, lon in rows}
+
+    def _placement_profiles(self, connection, application_ids):
+        """Map application ID -> (gender, pwd_status, latitude, longitude) of the applicant"""
+        if not application_ids:
+            return {}
+        rows = connection.execute(
+            select(
+                Application.id, Seeker.gender, Seeker.pwd_status, Seeker.latitude, Seeker.longitude
+            )
+            .join(Seeker, Application.seeker_id == Seeker.id)
+            .where(Application.id.in_(application_ids))
+        )
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def _seeker_placement_times(self, connection, seeker_id):
+        return connection.execute(
+            select(Feedback.created_at)
+            .join(Application, Feedback.application_id == Application.id)
+            .where(
+                Application.seeker_id == seeker_id,
+                Feedback.completed.is_(True),
+                Feedback.payment_confirmed.is_(True),
+            )
+        ).scalars().all()
+
+    def track(self, session, flush_context):
+        """after_flush hook: fold flushed seekers, applications and feedback into the rollups"""
+        connection = session.connection()
+        deltas = defaultdict(Counter)
+        applications = []
+        placed = []
+        unplaced = []
+        for obj in session.new:
+            if isinstance(obj, Seeker):
+                self._add(deltas, obj.created_at, self.region(obj.latitude, obj.longitude), seekers=1)
+            elif isinstance(obj, Application):
+                applications.append((obj, 1, obj.match_score or 0.0))
+            elif isinstance(obj, Feedback) and is_placement(obj):
+                placed.append(obj)
+        for obj in session.dirty:
+            if isinstance(obj, Application):
+                change = _changed(obj, "match_score")
+                if change:
+                    applications.append((obj, 0, (change[1] or 0.0) - (change[0] or 0.0)))
+            elif isinstance(obj, Feedback):
+                completed = _changed(obj, "completed")
+                confirmed = _changed(obj, "payment_confirmed")
+                if completed or confirmed:
+                    was = bool(completed[0] if completed else obj.completed) and bool(
+                        confirmed[0] if confirmed else obj.payment_confirmed
+                    )
+                    if was != is_placement(obj):
+                        (placed if not was else unplaced).append(obj)
+            elif isinstance(obj, Seeker):
+                gender = _changed(obj, "gender")
+                pwd = _changed(obj, "pwd_status")
+                if gender or pwd:
+                    women = is_female(gender[1]) - is_female(gender[0]) if gender else 0
+                    pwd_change = bool(pwd[1]) - bool(pwd[0]) if pwd else 0
+                    region = self.region(obj.latitude, obj.longitude)
+                    for placed_at in self._seeker_placement_times(connection, obj.id):
+                        self._add(
+                            deltas,
+                            placed_at,
+                            region,
+                            women_placements=women,
+                            pwd_placements=pwd_change,
+                        )
+        for obj in session.deleted:
+            if isinstance(obj, Seeker):
+                self._add(deltas, obj.created_at, self.region(obj.latitude, obj.longitude), seekers=-1)
+            elif isinstance(obj, Application):
+                applications.append((obj, -1, -(obj.match_score or 0.0)))
+            elif isinstance(obj, Feedback) and is_placement(obj):
+                unplaced.append(obj)
+
+        if applications:
+            locations = self._seeker_locations(connection, {obj.seeker_id for obj, _, _ in applications})
+            for obj, count, score in applications:
+                self._add(
+                    deltas,
+                    obj.created_at,
+                    self.region(*locations.get(obj.seeker_id, (None, None))),
+                    applications=count,
+                    match_score_sum=score,
+                )
+        if placed or unplaced:
+            profiles = self._placement_profiles(
+                connection, {obj.application_id for obj in placed + unplaced}
+            )
+            for objs, sign in ((placed, 1), (unplaced, -1)):
+                for obj in objs:
+                    gender, pwd, lat, lon = profiles.get(obj.application_id, (None, False, None, None))
+                    self._add(
+                        deltas,
+                        obj.created_at,
+                        self.region(lat, lon),
+                        placements=sign,
+                        women_placements=sign * is_female(gender),
+                        pwd_placements=sign * bool(pwd),
+                    )
+        self._bump(connection, deltas)
+
+    def record_searches(self, rows):
+        """Fold a batch of SearchLog row dicts into the rollups, in the caller's transaction"""
+        connection = db.session.connection()
+        locations = self._seeker_locations(connection, {row["seeker_id"] for row in rows})
+        deltas = defaultdict(Counter)
+        for row in rows:
+            self._add(
+                deltas,
+                row["created_at"],
+                self.region(*locations.get(row["seeker_id"], (None, None))),
+                searches=1,
+                search_ms_sum=row["duration_ms"],
+            )
+        self._bump(connection, deltas)
+
+    def totals(self):
+        row = MetricRollup.query.filter_by(period=TOTAL, period_start=EPOCH, region="").first()
+        return {name: getattr(row, name) if row else 0 for name in COUNTERS}
+
+    def series(self, period, start, end, region=None):
+        """
+        Sum bucketed counters over all regions, or one region, for buckets in [start, end)
+
+        Returns:
+            dict: bucket start datetime -> counter dict, only for buckets with data
+        """
+        query = MetricRollup.query.filter(
+            MetricRollup.period == period,
+            MetricRollup.period_start >= bucket_start(start, period),
+            MetricRollup.period_start < end,
+        )
+        if region is not None:
+            query = query.filter(MetricRollup.region == region)
+        rows = (
+            query.group_by(MetricRollup.period_start)
+            .with_entities(
+                MetricRollup.period_start,
+                *[func.sum(getattr(MetricRollup, name)) for name in COUNTERS],
+            )
+            .all()
+        )
+        return {row[0]: dict(zip(COUNTERS, row[1:])) for row in rows}
+
+    def _build_buckets(self):
+        """Backfill hourly and daily rows from the source tables, attributed to seekers' current cells"""
+        deltas = defaultdict(Counter)
+        for created_at, lat, lon in db.session.execute(
+            select(Seeker.created_at, Seeker.latitude, Seeker.longitude)
+        ):
+            self._add(deltas, created_at, self.region(lat, lon), total=False, seekers=1)
+        for created_at, score, lat, lon in db.session.execute(
+            select(Application.created_at, Application.match_score, Seeker.latitude, Seeker.longitude)
+            .outerjoin(Seeker, Application.seeker_id == Seeker.id)
+        ):
+            self._add(
+                deltas,
+                created_at,
+                self.region(lat, lon),
+                total=False,
+                applications=1,
+                match_score_sum=score or 0.0,
+            )
+        for created_at, gender, pwd, lat, lon in db.session.execute(
+            select(
+                Feedback.created_at, Seeker.gender, Seeker.pwd_status, Seeker.latitude, Seeker.longitude
+            )
+            .outerjoin(Application, Feedback.application_id == Application.id)
+            .outerjoin(Seeker, Application.seeker_id == Seeker.id)
+            .where(Feedback.completed.is_(True), Feedback.payment_confirmed.is_(True))
+        ):
+            self._add(
+                deltas,
+                created_at,
+                self.region(lat, lon),
+                total=False,
+                placements=1,
+                women_placements=int(is_female(gender)),
+                pwd_placements=int(bool(pwd)),
+            )
+        for created_at, duration_ms, lat, lon in db.session.execute(
+            select(SearchLog.created_at, SearchLog.duration_ms, Seeker.latitude, Seeker.longitude)
+            .outerjoin(Seeker, SearchLog.seeker_id == Seeker.id)
+        ):
+            self._add(
+                deltas,
+                created_at,
+                self.region(lat, lon),
+                total=False,
+                searches=1,
+                search_ms_sum=duration_ms,
+            )
+        self._bump(db.session.connection(), deltas)
+
+    def _source_counts(self):
+        placements = (
+            Feedback.query.join(Application, Feedback.application_id == Application.id)
+            .join(Seeker, Application.seeker_id == Seeker.id)
+            .filter(Feedback.completed.is_(True), Feedback.payment_confirmed.is_(True))
+        )
+        return {
+            "seekers": Seeker.query.with_entities(func.count(Seeker.id)).scalar_subquery(),
+            "applications": Application.query.with_entities(
+                func.count(Application.id)
+            ).scalar_subquery(),
+            "match_score_sum": Application.query.with_entities(
+                func.coalesce(func.sum(Application.match_score), 0.0)
+            ).scalar_subquery(),
+            "placements": Feedback.query.filter(
+                Feedback.completed.is_(True), Feedback.payment_confirmed.is_(True)
+            )
+            .with_entities(func.count(Feedback.id))
+            .scalar_subquery(),
+            "women_placements": placements.filter(Seeker.gender.ilike("female"))
+            .with_entities(func.count(Feedback.id))
+            .scalar_subquery(),
+            "pwd_placements": placements.filter(Seeker.pwd_status.is_(True))
+            .with_entities(func.count(Feedback.id))
+            .scalar_subquery(),
+        }
+
+    def reconcile(self):
+        """
+        Recompute the all-time rollup from the source tables in one statement
+
+        Search counters, and the hourly/daily rows, are only computed from the
+        source tables when first built: retention prunes old SearchLog rows,
+        while the rollups keep history written in the same transaction as each batch.
+
+        Returns:
+            dict: Counter corrections that were applied (new minus old)
+        """
+        with self.app.app_context():
+            try:
+                before = self.totals()
+                exists = (
+                    MetricRollup.query.filter_by(period=TOTAL, period_start=EPOCH, region="").first()
+                    is not None
+                )
+                values = self._source_counts()
+                if not exists:
+                    db.session.execute(
+                        insert(MetricRollup).values(period=TOTAL, period_start=EPOCH, region="")
+                    )
+                    values["searches"] = SearchLog.query.with_entities(
+                        func.count(SearchLog.id)
+                    ).scalar_subquery()
+                    values["search_ms_sum"] = SearchLog.query.with_entities(
+                        func.coalesce(func.sum(SearchLog.duration_ms), 0)
+                    ).scalar_subquery()
+                if MetricRollup.query.filter(MetricRollup.period.in_(BUCKETS)).first() is None:
+                    self._build_buckets()
+                db.session.execute(
+                    update(MetricRollup)
+                    .where(
+                        MetricRollup.period == TOTAL,
+                        MetricRollup.period_start == EPOCH,
+                        MetricRollup.region == "",
+                    )
+                    .values(updated_at=datetime.utcnow(), **values)
+                )
+                db.session.commit()
+                after = self.totals()
+                return {
+                    name: after[name] - before[name]
+                    for name in COUNTERS
+                    if abs(after[name] - before[name]) > 1e-6
+                }
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+
+    def start(self, interval):
+        if self._thread is not None or interval <= 0:
+            return
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval,), name="metric-reconcile", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                drift = self.reconcile()
+                if drift:
+                    print(f"Metric rollup drift corrected: {drift}")
+            except Exception as e:
+                print(f"Metric rollup reconciliation failed: {str(e)}")
@@ -0,0 +1,158 @@
+"""
+Delivery scheduler for JobMatch
+Queues claimed outbox deliveries by notification priority and hands them to
+workers by smooth weighted round-robin, within a per-channel send budget, so
+interview and offer messages are not stuck behind bulk match alerts
+"""
+import time
+from collections import deque
+from threading import Condition
+
+
+PRIORITIES = ("urgent", "high", "normal", "low")
+DEFAULT_WEIGHTS = {"urgent": 8, "high": 4, "normal": 2, "low": 1}
+
+
+class ChannelBudget:
+    """Token bucket allowing rate sends per second with up to one second of burst"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self, now):
+        self._refill(now)
+        return self._tokens >= 1
+
+    def take(self):
+        self._tokens -= 1
+
+    def wait_time(self, now):
+        self._refill(now)
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+
+class DeliveryScheduler:
+    """Per-priority, per-channel delivery queues; channels without a budget are unlimited"""
+
+    def __init__(self, weights=None, budgets=None):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self._budgets = {
+            channel: ChannelBudget(rate) for channel, rate in (budgets or {}).items() if rate
+        }
+        self._queues = {priority: {} for priority in PRIORITIES}
+        self._credit = {priority: 0 for priority in PRIORITIES}
+        self._size = 0
+        self._closed = False
+        self._cond = Condition()
+
+    def __len__(self):
+        with self._cond:
+            return self._size
+
+    def put(self, item, priority, channel):
+        if priority not in self._queues:
+            priority = "normal"
+        with self._cond:
+            self._queues[priority].setdefault(channel, deque()).append(item)
+            self._size += 1
+            self._cond.notify()
+
+    def close(self):
+        """Wake every waiting worker; get() returns None from now on"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def depths(self):
+        with self._cond:
+            return {
+                priority: sum(len(queue) for queue in channels.values())
+                for priority, channels in self._queues.items()
+            }
+
+    def _ready_channels(self, priority, now):
+        return [
+            channel
+            for channel, queue in self._queues[priority].items()
+            if queue and (channel not in self._budgets or self._budgets[channel].available(now))
+        ]
+
+    def _pick(self, now):
+        ready = {}
+        for priority in PRIORITIES:
+            channels = self._ready_channels(priority, now)
+            if channels:
+                ready[priority] = channels
+        if not ready:
+            return None
+
+        # Smooth weighted round-robin over the priorities that can send now
+        total = 0
+        for priority in ready:
+            self._credit[priority] += self.weights[priority]
+            total += self.weights[priority]
+        priority = max(ready, key=lambda p: self._credit[p])
+        self._credit[priority] -= total
+
+        # Serve the channel that has waited longest within this priority
+        channels = self._queues[priority]
+        channel = ready[priority][0]
+        queue = channels.pop(channel)
+        item = queue.popleft()
+        if queue:
+            channels[channel] = queue
+        if channel in self._budgets:
+            self._budgets[channel].take()
+        self._size -= 1
+        return item
+
+    def _next_wait(self, now):
+        waits = [
+            self._budgets[channel].wait_time(now)
+            for channels in self._queues.values()
+            for channel, queue in channels.items()
+            if queue and channel in self._budgets
+        ]
+        return min(waits) if waits else None
+
+    def take_ready(self, channel, limit):
+        """Pop up to limit more items queued for channel that the budget allows now, most urgent first"""
+        items = []
+        with self._cond:
+            budget = self._budgets.get(channel)
+            now = time.monotonic()
+            for priority in PRIORITIES:
+                queue = self._queues[priority].get(channel)
+                while queue and len(items) < limit and (budget is None or budget.available(now)):
+                    items.append(queue.popleft())
+                    if budget is not None:
+                        budget.take()
+                    self._size -= 1
+                if queue is not None and not queue:
+                    del self._queues[priority][channel]
+        return items
+
+    def get(self, timeout=None):
+        """Block until a delivery may be sent and return it, or None on timeout/close"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                item = self._pick(now)
+                if item is not None:
+                    return item
+                wait = self._next_wait(now)
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+            return None
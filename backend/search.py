@@ -0,0 +1,90 @@
+"""
+Full-text job search for JobMatch
+Maintains an SQLite FTS5 index over job titles and required skills so
+keyword search is an index lookup instead of a LIKE scan over every job
+"""
+import re
+
+from sqlalchemy import column, literal_column, select, table, text
+from sqlalchemy.exc import OperationalError
+
+
+# External-content FTS5 table over job(title, required_skills); the prefix
+# option keeps "milk*" style queries on the index
+JOB_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS job_fts USING fts5(
+        title, required_skills,
+        content='job', content_rowid='id',
+        tokenize='unicode61', prefix='2 3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS job_fts_ai AFTER INSERT ON job BEGIN
+        INSERT INTO job_fts(rowid, title, required_skills)
+        VALUES (new.id, new.title, new.required_skills);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS job_fts_ad AFTER DELETE ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, title, required_skills)
+        VALUES ('delete', old.id, old.title, old.required_skills);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS job_fts_au AFTER UPDATE OF title, required_skills ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, title, required_skills)
+        VALUES ('delete', old.id, old.title, old.required_skills);
+        INSERT INTO job_fts(rowid, title, required_skills)
+        VALUES (new.id, new.title, new.required_skills);
+    END
+    """,
+]
+
+# bm25 column weights: a hit in the title counts double a hit in the skills
+TITLE_WEIGHT = 2.0
+SKILLS_WEIGHT = 1.0
+
+
+def ensure_job_fts(session):
+    """
+    Create the FTS5 table and its sync triggers, backfilling it on first creation
+
+    Returns:
+        bool: True if FTS5 search is available, False if SQLite lacks FTS5
+    """
+    try:
+        exists = session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'job_fts'")
+        ).first()
+        for statement in JOB_FTS_DDL:
+            session.execute(text(statement))
+        if not exists:
+            session.execute(text("INSERT INTO job_fts(job_fts) VALUES ('rebuild')"))
+        session.commit()
+        return True
+    except OperationalError as e:
+        print(f"Full-text search unavailable, falling back to LIKE: {str(e)}")
+        session.rollback()
+        return False
+
+
+def fts_query(raw_query):
+    """Turn free text into an FTS5 query that ANDs quoted prefix terms, or None if empty"""
+    terms = re.findall(r"\w+", raw_query.lower())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def job_fts_matches(match_query):
+    """Subquery of (job_id, rank) for jobs matching an FTS5 query; lower rank is better"""
+    return (
+        select(
+            column("rowid").label("job_id"),
+            literal_column(f"bm25(job_fts, {TITLE_WEIGHT}, {SKILLS_WEIGHT})").label("rank"),
+        )
+        .select_from(table("job_fts"))
+        .where(literal_column("job_fts").op("MATCH")(match_query))
+        .subquery()
+    )
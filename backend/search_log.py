@@ -0,0 +1,110 @@
+"""
+Search timing log for JobMatch
+Buffers SearchLog rows in memory and writes them in batches from a background
+thread, so match searches never wait on the SQLite write lock
+"""
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from models import SearchLog, db
+
+
+class SearchLogBuffer:
+    """Bounded write-behind buffer of search timings, flushed on size, interval and exit"""
+
+    def __init__(self, app, max_size=10000, batch_size=500, flush_interval=5.0, on_write=None):
+        self.app = app
+        # Called with each batch of row dicts inside the transaction that inserts it
+        self.on_write = on_write
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._rows = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, seeker_id, duration_ms):
+        """Queue one search timing; the oldest entry is dropped if the buffer is full"""
+        with self._lock:
+            if len(self._rows) >= self.max_size:
+                self._rows.popleft()
+                self.dropped += 1
+            self._rows.append(
+                {"seeker_id": seeker_id, "duration_ms": duration_ms, "created_at": datetime.utcnow()}
+            )
+            self.recorded += 1
+            full = len(self._rows) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="search-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the writer and flush whatever is still buffered"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Search log flush failed: {str(e)}")
+
+    def flush(self):
+        """Write buffered rows in batches; rows of a failed batch go back to the buffer"""
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+                if not batch:
+                    return
+                with self.app.app_context():
+                    try:
+                        db.session.execute(insert(SearchLog), batch)
+                        if self.on_write is not None:
+                            self.on_write(batch)
+                        db.session.commit()
+                    except Exception:
+                        db.session.rollback()
+                        with self._lock:
+                            self._rows.extendleft(reversed(batch))
+                            while len(self._rows) > self.max_size:
+                                self._rows.popleft()
+                                self.dropped += 1
+                        raise
+                    finally:
+                        db.session.remove()
+                with self._lock:
+                    self.written += len(batch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "buffered": len(self._rows),
+                "max_size": self.max_size,
+                "recorded": self.recorded,
+                "written": self.written,
+                "dropped": self.dropped,
+            }
@@ -0,0 +1,107 @@
+"""
+Spatial index for JobMatch
+Keeps active job locations in a fixed lat/lon grid so radius queries only
+look at the cells around the seeker instead of every job in the state
+"""
+import math
+from threading import Lock
+
+from matching import haversine_km
+
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def bounding_box(lat, lon, radius_km):
+    """Return (min_lat, max_lat, min_lon, max_lon) that encloses a radius around a point"""
+    angular = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angular)
+    cos_lat = math.cos(math.radians(lat))
+    if math.sin(angular) >= cos_lat:
+        delta_lon = 180.0
+    else:
+        delta_lon = math.degrees(math.asin(math.sin(angular) / cos_lat))
+    return lat - delta_lat, lat + delta_lat, lon - delta_lon, lon + delta_lon
+
+
+class JobGrid:
+    """Fixed-size lat/lon grid mapping cells to the active job IDs inside them"""
+
+    def __init__(self, cell_size_deg=0.25, max_cells_per_query=400):
+        self.cell_size = cell_size_deg
+        self.max_cells_per_query = max_cells_per_query
+        self._cells = {}
+        self._points = {}
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def _discard(self, job_id):
+        point = self._points.pop(job_id, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(job_id)
+            if not members:
+                del self._cells[cell]
+
+    def upsert(self, job_id, lat, lon):
+        with self._lock:
+            self._discard(job_id)
+            self._points[job_id] = (lat, lon)
+            self._cells.setdefault(self._cell(lat, lon), set()).add(job_id)
+
+    def remove(self, job_id):
+        with self._lock:
+            self._discard(job_id)
+
+    def sync(self, job):
+        """Index or drop a job depending on whether it is active"""
+        if job.active:
+            self.upsert(job.id, job.latitude, job.longitude)
+        else:
+            self.remove(job.id)
+
+    def rebuild(self, rows):
+        """Replace the index contents with (job_id, latitude, longitude) rows"""
+        with self._lock:
+            self._cells = {}
+            self._points = {}
+            for job_id, lat, lon in rows:
+                self._points[job_id] = (lat, lon)
+                self._cells.setdefault(self._cell(lat, lon), set()).add(job_id)
+
+    def within(self, lat, lon, radius_km):
+        """
+        Find indexed jobs within radius_km of a point
+
+        Returns:
+            dict: job_id -> exact haversine distance in km
+        """
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        row_start, col_start = self._cell(min_lat, min_lon)
+        row_end, col_end = self._cell(max_lat, max_lon)
+
+        with self._lock:
+            cell_count = (row_end - row_start + 1) * (col_end - col_start + 1)
+            if cell_count > self.max_cells_per_query:
+                candidates = list(self._points.items())
+            else:
+                candidates = []
+                for row in range(row_start, row_end + 1):
+                    for col in range(col_start, col_end + 1):
+                        for job_id in self._cells.get((row, col), ()):
+                            candidates.append((job_id, self._points[job_id]))
+
+        results = {}
+        for job_id, (job_lat, job_lon) in candidates:
+            distance_km = haversine_km(lat, lon, job_lat, job_lon)
+            if distance_km <= radius_km:
+                results[job_id] = distance_km
+        return results
@@ -0,0 +1,129 @@
+"""
+SQL profiling for JobMatch
+Per-request query counts, SQL time and slowest statements, detection of the
+same statement repeated row by row (N+1), and a query budget guard for
+exercising routes
+"""
+import heapq
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize_statement(statement):
+    """Collapse whitespace and IN lists so executions of one query compare equal"""
+    return _IN_LIST.sub("(?...)", " ".join(statement.split()))
+
+
+class QueryProfile:
+    """Statements issued by one request (or one guarded block)"""
+
+    def __init__(self, keep_slowest=3):
+        self.keep_slowest = keep_slowest
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+        self._slowest = []
+        self._last_context = None
+
+    def add(self, statement, seconds, context=None, executemany=False):
+        """
+        Count one statement; returns False if it continued the previous one
+
+        SQLite runs an ORM multi-row INSERT ... RETURNING or an executemany as
+        a series of cursor executions under one execution context. Those count
+        as a single statement (their time is still added).
+        """
+        if executemany and context is not None and context is self._last_context:
+            self.seconds += seconds
+            return False
+        self._last_context = context
+        self.queries += 1
+        self.seconds += seconds
+        statement = normalize_statement(statement)
+        self.statements[statement] += 1
+        entry = (seconds, self.queries, statement)
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, entry)
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+        return True
+
+    def slowest(self):
+        return [(statement, seconds) for seconds, _, statement in sorted(self._slowest, reverse=True)]
+
+    def repeated(self, threshold):
+        """Statements executed at least threshold times, most frequent first"""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+    def header(self, threshold):
+        """Compact summary for the X-SQL-Profile debug header"""
+        return "queries={}; time_ms={:.1f}; repeated={}".format(
+            self.queries, self.seconds * 1000, len(self.repeated(threshold))
+        )
+
+    def report(self, threshold):
+        lines = [f"{self.queries} queries in {self.seconds * 1000:.1f} ms"]
+        for statement, count in self.repeated(threshold):
+            lines.append(f"  repeated x{count}: {statement}")
+        for statement, seconds in self.slowest():
+            lines.append(f"  slow {seconds * 1000:.1f} ms: {statement}")
+        return "\n".join(lines)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(engine, max_queries, max_repeats=None):
+    """
+    Fail if the block issues more than max_queries statements on this thread
+
+    With max_repeats, also fail if any one statement runs more than that many
+    times (the signature of a query per row). Flask's test client handles the
+    request on the calling thread, so a route can be checked with:
+
+        with app.app_context(), query_budget(db.engine, 8, max_repeats=1):
+            client.post("/applications", json={"job_id": 1}, headers=headers)
+
+    Yields:
+        QueryProfile: Filled in as statements run
+    """
+    profile = QueryProfile()
+    thread = threading.get_ident()
+    started = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            started.append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread and started:
+            profile.add(statement, time.perf_counter() - started.pop(), context, executemany)
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    try:
+        yield profile
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+        event.remove(engine, "after_cursor_execute", after)
+
+    problems = []
+    if profile.queries > max_queries:
+        problems.append(f"{profile.queries} queries (budget {max_queries})")
+    if max_repeats is not None:
+        problems.extend(
+            f"statement run {count} times (limit {max_repeats})"
+            for _, count in profile.repeated(max_repeats + 1)
+        )
+    if problems:
+        raise QueryBudgetExceeded("; ".join(problems) + "\n" + profile.report(2))
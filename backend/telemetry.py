@@ -0,0 +1,241 @@
+"""
+Request telemetry for JobMatch
+In-process counters and log-linear latency histograms for routes, SQL
+statements and notification deliveries, rendered in the Prometheus text
+exposition format for /metrics
+"""
+import threading
+from bisect import bisect_left
+
+from sql_profile import QueryProfile
+
+
+def hdr_bounds(lowest, highest, sub_buckets=4):
+    """
+    Log-linear bucket upper bounds: each doubling of lowest is split into
+    sub_buckets equal steps, so relative error stays under 1/sub_buckets at any scale
+    """
+    bounds = []
+    base = lowest
+    while base < highest:
+        for step in range(sub_buckets):
+            bounds.append(float(f"{base * (1 + step / sub_buckets):.6g}"))
+        base *= 2
+    bounds.append(float(f"{base:.6g}"))
+    return bounds
+
+
+# Request and delivery latency in seconds, 100 microseconds to about a minute
+LATENCY_BOUNDS = hdr_bounds(0.0001, 60.0)
+# SQL statements issued by one request
+QUERY_COUNT_BOUNDS = [0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377]
+_INF = 'le="+Inf"'
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time"""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def render(self):
+        try:
+            value = self.read()
+        except Exception as e:
+            print(f"Gauge {self.name} failed: {str(e)}")
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+class Histogram:
+    """Fixed-bucket histogram per label set; observe() is a bisect and a locked add"""
+
+    def __init__(self, name, help_text, bounds, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.bounds = list(bounds)
+        self.label_names = tuple(label_names)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.bounds) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def quantile(self, q, *labels):
+        """Estimate a quantile by interpolating inside the bucket that contains it"""
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None or not series[2]:
+                return None
+            counts, _, total = list(series[0]), series[1], series[2]
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: (list(series[0]), series[1], series[2]) for labels, series in self._series.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total_sum, total) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds, counts):
+                cumulative += count
+                extra = f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, extra)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, _INF)} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total_sum:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {total}")
+        return lines
+
+
+class Telemetry:
+    """The metrics JobMatch exports, plus a per-thread SQL profile of the current request"""
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, prefix="jobmatch"):
+        self.prefix = prefix
+        self.requests = Counter(
+            f"{prefix}_http_requests_total", "HTTP requests by route and status",
+            ("method", "route", "status"),
+        )
+        self.request_latency = Histogram(
+            f"{prefix}_http_request_duration_seconds", "HTTP request latency by route",
+            LATENCY_BOUNDS, ("method", "route"),
+        )
+        self.request_queries = Histogram(
+            f"{prefix}_http_request_db_queries", "SQL statements issued per HTTP request",
+            QUERY_COUNT_BOUNDS, ("method", "route"),
+        )
+        self.db_queries = Counter(
+            f"{prefix}_db_queries_total", "SQL statements executed, by caller", ("source",)
+        )
+        self.db_latency = Histogram(
+            f"{prefix}_db_query_duration_seconds", "SQL statement latency", LATENCY_BOUNDS
+        )
+        self.deliveries = Counter(
+            f"{prefix}_notification_deliveries_total", "Outbox delivery attempts by outcome",
+            ("channel", "result"),
+        )
+        self.delivery_latency = Histogram(
+            f"{prefix}_notification_delivery_duration_seconds",
+            "Time to hand one email/SMS (or digest) to the provider",
+            LATENCY_BOUNDS, ("channel", "result"),
+        )
+        self.gauges = []
+        self._local = threading.local()
+
+    def gauge(self, name, help_text, read):
+        self.gauges.append(Gauge(f"{self.prefix}_{name}", help_text, read))
+
+    def begin_request(self):
+        self._local.profile = QueryProfile()
+
+    def current_request(self):
+        """The QueryProfile of the request in progress on this thread, or None"""
+        return getattr(self._local, "profile", None)
+
+    def end_request(self):
+        """Return the QueryProfile of the request handled on this thread, or None"""
+        profile = getattr(self._local, "profile", None)
+        self._local.profile = None
+        return profile
+
+    def record_query(self, statement, seconds, context=None, executemany=False):
+        """Count a cursor execution; later rows of one executemany batch only add time"""
+        profile = getattr(self._local, "profile", None)
+        if profile is not None:
+            if not profile.add(statement, seconds, context, executemany):
+                return
+        elif executemany and context is not None and context is getattr(self._local, "context", None):
+            return
+        self._local.context = context
+        self.db_queries.inc("request" if profile is not None else "background")
+        self.db_latency.observe(seconds)
+
+    def record_request(self, method, route, status, seconds, queries):
+        self.requests.inc(method, route, str(status))
+        self.request_latency.observe(seconds, method, route)
+        self.request_queries.observe(queries, method, route)
+
+    def record_delivery(self, channel, result, seconds):
+        self.deliveries.inc(channel, result)
+        self.delivery_latency.observe(seconds, channel, result)
+
+    def _quantile_lines(self):
+        name = f"{self.prefix}_http_request_duration_quantile_seconds"
+        lines = [
+            f"# HELP {name} Estimated request latency quantiles from the HDR-style buckets",
+            f"# TYPE {name} gauge",
+        ]
+        for labels in sorted(self.request_latency.snapshot()):
+            for q in self.QUANTILES:
+                value = self.request_latency.quantile(q, *labels)
+                extra = f'quantile="{q:g}"'
+                lines.append(f"{name}{_labels(('method', 'route'), labels, extra)} {value:.6f}")
+        return lines
+
+    def render(self):
+        lines = []
+        for metric in (
+            self.requests,
+            self.request_latency,
+            self.request_queries,
+            self.db_queries,
+            self.db_latency,
+            self.deliveries,
+            self.delivery_latency,
+        ):
+            lines.extend(metric.render())
+        lines.extend(self._quantile_lines())
+        for gauge in self.gauges:
+            lines.extend(gauge.render())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,104 @@
+"""
+Shared fixtures for the JobMatch backend tests
+Each test gets its own SQLite file. Background workers are left off (no
+outbox workers, retention or reconcile loops) so tests drive them directly.
+"""
+import pytest
+from flask import Flask
+
+from app import create_app
+from models import db
+
+
+SEEKER = {
+    "role": "seeker",
+    "name": "Lakshmi",
+    "mobile_number": "9876543210",
+    "age": 30,
+    "gender": "female",
+    "skills": "milking, cleaning, tractor",
+    "expected_wage": 500,
+    "work_hours": "morning",
+    "duration_pref": "full-time",
+    "education_level": "none",
+    "latitude": 11.34,
+    "longitude": 77.72,
+    "max_distance_km": 300,
+}
+PROVIDER = {
+    "role": "provider",
+    "business_name": "Erode Dairy",
+    "contact_info": "0424 000000",
+    "location_text": "Erode",
+    "latitude": 11.3,
+    "longitude": 77.7,
+}
+
+
+@pytest.fixture
+def app_config():
+    """Extra config for the app fixture; override in a test module to change it"""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, app_config):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'jobmatch.db'}",
+        "NOTIFICATION_WORKERS": 0,
+        "RETENTION_ARCHIVE_DIR": str(tmp_path / "archive"),
+        "PROFILE_DIR": str(tmp_path / "profiles"),
+        "RETENTION_INTERVAL_SECONDS": 0,
+        "METRICS_RECONCILE_SECONDS": 0,
+        **app_config,
+    })
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def register(client):
+    """Register a user and return (registration response JSON, auth headers)"""
+
+    def register(email, profile):
+        response = client.post("/auth/register", json={"email": email, "password": "secret", **profile})
+        assert response.status_code == 201, response.get_json()
+        login = client.post("/auth/login", json={"email": email, "password": "secret"})
+        token = login.get_json()["access_token"]
+        return response.get_json(), {"Authorization": f"Bearer {token}"}
+
+    return register
+
+
+@pytest.fixture
+def seeker(register):
+    """(registration JSON, auth headers) of a seeker near Erode"""
+    return register("seeker@example.com", SEEKER)
+
+
+@pytest.fixture
+def provider(register):
+    """(registration JSON, auth headers) of a provider near Erode"""
+    return register("provider@example.com", PROVIDER)
+
+
+@pytest.fixture
+def plain_app(tmp_path):
+    """Bare app with the JobMatch schema, for components that only need the database"""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'plain.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,51 @@
+"""
+Match pages served from the cached ranking
+"""
+import pytest
+
+from models import SeekerJobMatch, db
+
+
+@pytest.fixture
+def job_ids(client, provider):
+    ids = []
+    for index in range(3):
+        job = {
+            "title": f"Milker {index}",
+            "required_skills": "milking",
+            "wage": 500,
+            "work_hours": "morning",
+            "duration": "full-time",
+            "required_education": "none",
+            "latitude": 11.34 + index * 0.01,
+            "longitude": 77.72,
+        }
+        response = client.post("/jobs", json=job, headers=provider[1])
+        assert response.status_code == 201
+        ids.append(response.get_json()["job_id"])
+    return ids
+
+
+def test_first_page_is_bounded(client, seeker, job_ids):
+    body = client.get(f"/match_jobs/{seeker[0]['seeker_id']}?limit=2").get_json()
+    assert len(body["matches"]) == 2
+    assert body["total"] == 3
+    assert body["next_offset"] == 2
+    assert all("details" in match for match in body["matches"])
+
+
+def test_match_row_removed_after_ranking_is_cached(app, client, seeker, job_ids):
+    seeker_id = seeker[0]["seeker_id"]
+    cached = client.get(f"/match_jobs/{seeker_id}").get_json()
+    assert sorted(match["job_id"] for match in cached["matches"]) == sorted(job_ids)
+
+    # As if another process rematerialized the job without invalidating this cache
+    with app.app_context():
+        SeekerJobMatch.query.filter_by(seeker_id=seeker_id, job_id=job_ids[0]).delete()
+        db.session.commit()
+
+    response = client.get(f"/match_jobs/{seeker_id}")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert sorted(match["job_id"] for match in body["matches"]) == sorted(job_ids[1:])
+    assert body["total"] == 2
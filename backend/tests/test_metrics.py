@@ -0,0 +1,28 @@
+"""
+/metrics access: scrapes need the configured bearer token whatever their address
+"""
+import pytest
+
+
+@pytest.fixture
+def app_config():
+    return {"METRICS_TOKEN": "scrape-secret"}
+
+
+def test_scrape_with_token(client):
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer wrong"}, {"Authorization": "scrape-secret"}])
+def test_local_scrape_without_token_is_refused(client, headers):
+    # Behind a reverse proxy every client arrives from 127.0.0.1
+    response = client.get("/metrics", headers=headers, environ_base={"REMOTE_ADDR": "127.0.0.1"})
+    assert response.status_code == 403
+
+
+def test_unset_token_closes_the_endpoint(app, client):
+    app.config["METRICS_TOKEN"] = None
+    response = client.get("/metrics", headers={"Authorization": "Bearer "})
+    assert response.status_code == 403
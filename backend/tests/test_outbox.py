@@ -0,0 +1,253 @@
+"""
+Outbox claims, retries and stale claim recovery
+The dispatcher is driven by hand: no poller or worker threads are started
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import outbox as outbox_module
+from models import Notification, NotificationOutbox, User, db
+from notifications import DIGEST_TYPES, SmsDeferred, get_new_job_notification
+from outbox import OutboxDispatcher
+
+
+@pytest.fixture
+def dispatcher(plain_app):
+    return OutboxDispatcher(plain_app, workers=0, max_attempts=2, backoff_base=30.0, digest_window=0)
+
+
+@pytest.fixture
+def notify(plain_app, dispatcher):
+    """Queue one notification with a delivery per channel; returns the delivery IDs"""
+    with plain_app.app_context():
+        user = User(email="seeker@example.com", password_hash="x", role="seeker")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    def notify(priority="normal", channels=("email",), digest_summary=None, notification_type="match"):
+        with plain_app.app_context():
+            notification = Notification(
+                user_id=user_id,
+                notification_type=notification_type,
+                title="New Job Match Found!",
+                message="Milk Collector",
+                priority=priority,
+            )
+            db.session.add(notification)
+            db.session.flush()
+            deliveries = [
+                dispatcher.enqueue(
+                    notification,
+                    channel=channel,
+                    recipient="seeker@example.com" if channel == "email" else "+919876543210",
+                    subject=notification.title,
+                    body=notification.message,
+                    digest_summary=digest_summary,
+                )
+                for channel in channels
+            ]
+            db.session.commit()
+            return [delivery.id for delivery in deliveries]
+
+    return notify
+
+
+def _delivery(app, delivery_id):
+    with app.app_context():
+        delivery = db.session.get(NotificationOutbox, delivery_id)
+        db.session.expunge(delivery)
+        return delivery
+
+
+def test_claim_orders_by_priority_and_claims_once(plain_app, dispatcher, notify):
+    low = notify("low")[0]
+    urgent = notify("urgent")[0]
+    normal = notify("normal")[0]
+
+    claimed = dispatcher._claim_due()
+    assert [ids for ids, _, _ in claimed] == [(urgent,), (normal,), (low,)]
+    for delivery_id in (low, urgent, normal):
+        delivery = _delivery(plain_app, delivery_id)
+        assert delivery.status == "sending"
+        assert delivery.claimed_at is not None
+    assert dispatcher._claim_due() == []
+
+
+def test_full_backlog_only_claims_expedited(plain_app, dispatcher, notify):
+    dispatcher.max_backlog = 0
+    bulk = notify("normal")[0]
+    high = notify("high")[0]
+
+    assert [ids for ids, _, _ in dispatcher._claim_due()] == [(high,)]
+    assert _delivery(plain_app, bulk).status == "pending"
+
+
+def test_failed_send_is_retried_with_backoff(plain_app, dispatcher, notify, monkeypatch):
+    monkeypatch.setattr(outbox_module, "send_bulk_email", lambda messages: [False] * len(messages))
+    delivery_id = notify()[0]
+
+    dispatcher._claim_due()
+    before = datetime.utcnow()
+    dispatcher._deliver("email", [(delivery_id,)])
+    delivery = _delivery(plain_app, delivery_id)
+    assert delivery.status == "pending"
+    assert delivery.attempts == 1
+    assert delivery.claimed_at is None
+    assert delivery.last_error == "email provider rejected the message"
+    assert delivery.next_attempt_at >= before + timedelta(seconds=30)
+    # Not due again until the backoff has passed
+    assert dispatcher._claim_due() == []
+
+    with plain_app.app_context():
+        NotificationOutbox.query.filter_by(id=delivery_id).update({"next_attempt_at": before})
+        db.session.commit()
+    assert [ids for ids, _, _ in dispatcher._claim_due()] == [(delivery_id,)]
+    dispatcher._deliver("email", [(delivery_id,)])
+    delivery = _delivery(plain_app, delivery_id)
+    assert delivery.status == "failed"
+    assert delivery.attempts == 2
+
+
+def test_sent_deliveries_mark_the_notification(plain_app, dispatcher, notify, monkeypatch):
+    batches = []
+
+    def send_bulk_email(messages):
+        batches.append([recipient for recipient, _, _, _ in messages])
+        return [True] * len(messages)
+
+    monkeypatch.setattr(outbox_module, "send_bulk_email", send_bulk_email)
+    monkeypatch.setattr(outbox_module, "send_sms", lambda to_phone, message: True)
+    first = notify(channels=("email", "sms"))
+    second = notify(channels=("email",))
+
+    dispatcher._claim_due()
+    dispatcher._deliver("email", [(first[0],), (second[0],)])
+    dispatcher._deliver("sms", [(first[1],)])
+    # Both emails went out over one bulk send
+    assert batches == [["seeker@example.com", "seeker@example.com"]]
+    for delivery_id in first + second:
+        assert _delivery(plain_app, delivery_id).status == "sent"
+    with plain_app.app_context():
+        notification = db.session.get(NotificationOutbox, first[0]).notification_id
+        assert db.session.get(Notification, notification).sent_email
+        assert db.session.get(Notification, notification).sent_sms
+
+
+def test_digest_claims_held_deliveries_together(plain_app, dispatcher, notify, monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        outbox_module, "send_bulk_email", lambda messages: sent.extend(messages) or [True] * len(messages)
+    )
+    dispatcher.digest_window = 300.0
+    ids = [notify(digest_summary=f"Job {index}")[0] for index in range(3)]
+    # Held for the digest window, so nothing is due yet
+    assert dispatcher._claim_due() == []
+
+    with plain_app.app_context():
+        NotificationOutbox.query.filter_by(id=ids[0]).update({"next_attempt_at": datetime.utcnow()})
+        db.session.commit()
+    claimed = dispatcher._claim_due()
+    assert [group for group, _, _ in claimed] == [tuple(ids)]
+    dispatcher._deliver("email", [claimed[0][0]])
+    assert len(sent) == 1
+    assert sent[0][1] == "3 New Jobs For You"
+    assert all(_delivery(plain_app, delivery_id).status == "sent" for delivery_id in ids)
+
+
+def test_new_job_alerts_in_the_window_go_out_as_one_sms(plain_app, dispatcher, notify, monkeypatch):
+    sent = []
+    monkeypatch.setattr(outbox_module, "send_sms", lambda to_phone, message: sent.append(message) or True)
+    dispatcher.digest_window = 300.0
+    assert "new_job" in DIGEST_TYPES
+    ids = [
+        notify(
+            channels=("sms",),
+            digest_summary=get_new_job_notification(title, 400, "Erode")["summary"],
+            notification_type="new_job",
+        )[0]
+        for title in ("Milk Collector", "Farm Hand")
+    ]
+
+    with plain_app.app_context():
+        NotificationOutbox.query.filter(NotificationOutbox.id.in_(ids)).update(
+            {"next_attempt_at": datetime.utcnow()}
+        )
+        db.session.commit()
+    claimed = dispatcher._claim_due()
+    assert [group for group, _, _ in claimed] == [tuple(ids)]
+    dispatcher._deliver("sms", [claimed[0][0]])
+    assert len(sent) == 1
+    assert "Milk Collector" in sent[0] and "Farm Hand" in sent[0]
+    assert all(_delivery(plain_app, delivery_id).status == "sent" for delivery_id in ids)
+
+
+def test_requeue_stale_only_touches_old_claims(plain_app, dispatcher, notify):
+    stale, fresh = notify()[0], notify()[0]
+    dispatcher._claim_due()
+    with plain_app.app_context():
+        NotificationOutbox.query.filter_by(id=stale).update(
+            {"claimed_at": datetime.utcnow() - timedelta(seconds=dispatcher.claim_timeout + 60)}
+        )
+        db.session.commit()
+
+    assert dispatcher._requeue_stale() == 1
+    assert _delivery(plain_app, stale).status == "pending"
+    assert _delivery(plain_app, stale).claimed_at is None
+    assert _delivery(plain_app, fresh).status == "sending"
+
+
+def test_rate_limited_sms_is_deferred_without_an_attempt(plain_app, dispatcher, notify, monkeypatch):
+    def send_sms(to_phone, message):
+        raise SmsDeferred(20.0)
+
+    monkeypatch.setattr(outbox_module, "send_sms", send_sms)
+    delivery_id = notify(channels=("sms",))[0]
+
+    dispatcher._claim_due()
+    before = datetime.utcnow()
+    dispatcher._deliver("sms", [(delivery_id,)])
+    delivery = _delivery(plain_app, delivery_id)
+    assert delivery.status == "pending"
+    assert delivery.attempts == 0
+    assert delivery.last_error is None
+    assert delivery.next_attempt_at >= before + timedelta(seconds=20)
+
+
+def test_expedited_claims_are_capped(plain_app, dispatcher, notify):
+    dispatcher.max_backlog = 0
+    dispatcher.max_expedited_backlog = 2
+    urgent = [notify("urgent")[0] for _ in range(3)]
+
+    assert [ids for ids, _, _ in dispatcher._claim_due()] == [(urgent[0],), (urgent[1],)]
+    assert _delivery(plain_app, urgent[2]).status == "pending"
+
+
+def test_taking_a_delivery_restarts_its_claim(plain_app, dispatcher, notify, monkeypatch):
+    monkeypatch.setattr(outbox_module, "send_bulk_email", lambda messages: [False] * len(messages))
+    waited, requeued = notify()[0], notify()[0]
+    dispatcher._claim_due()
+    # Both sat in the scheduler past the claim timeout
+    with plain_app.app_context():
+        NotificationOutbox.query.update(
+            {"claimed_at": datetime.utcnow() - timedelta(seconds=dispatcher.claim_timeout + 60)}
+        )
+        db.session.commit()
+
+    original_send_all = dispatcher._send_all
+
+    def send_all(channel, messages):
+        # Recovery runs while the worker is sending and only finds the one still queued
+        assert dispatcher._requeue_stale() == 1
+        return original_send_all(channel, messages)
+
+    monkeypatch.setattr(dispatcher, "_send_all", send_all)
+    dispatcher._deliver("email", [(waited,)])
+    assert _delivery(plain_app, waited).attempts == 1
+
+    # The delivery recovery returned to pending is not sent by its old claim
+    monkeypatch.setattr(dispatcher, "_send_all", lambda channel, messages: pytest.fail("sent twice"))
+    dispatcher._deliver("email", [(requeued,)])
+    assert _delivery(plain_app, requeued).status == "pending"
+    assert _delivery(plain_app, requeued).attempts == 0
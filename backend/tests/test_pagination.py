@@ -0,0 +1,110 @@
+"""
+Keyset pagination through next_cursor
+Following the cursor visits every row once, in order, even when rows share
+a sort value
+"""
+import pytest
+
+
+def _job(index):
+    # Each job is a little further north of Erode than the one before
+    return {
+        "title": f"Farm Hand {index}",
+        "required_skills": "harvesting",
+        "wage": 400 + index,
+        "work_hours": "morning",
+        "duration": "full-time",
+        "required_education": "none",
+        "latitude": 11.34 + index * 0.05,
+        "longitude": 77.72,
+    }
+
+
+@pytest.fixture
+def job_ids(client, provider):
+    ids = []
+    # Posted in reverse, so creation order and distance order disagree
+    for index in reversed(range(7)):
+        response = client.post("/jobs", json=_job(index), headers=provider[1])
+        assert response.status_code == 201
+        ids.append(response.get_json()["job_id"])
+    return ids
+
+
+def _pages(client, url, key, headers=None):
+    pages = []
+    cursor = None
+    while True:
+        query = f"{url}&cursor={cursor}" if cursor else url
+        response = client.get(query, headers=headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        pages.append(body[key])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_jobs_cursor_visits_every_job_once(client, job_ids):
+    pages = _pages(client, "/jobs?limit=3", "jobs")
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [job["job_id"] for page in pages for job in page] == job_ids
+
+
+def test_jobs_cursor_by_distance(client, job_ids):
+    pages = _pages(client, "/jobs?limit=2&lat=11.34&lon=77.72", "jobs")
+    jobs = [job for page in pages for job in page]
+    assert [job["job_id"] for job in jobs] == list(reversed(job_ids))
+    distances = [job["distance_km"] for job in jobs]
+    assert distances == sorted(distances)
+
+
+def test_jobs_cursor_respects_radius(client, job_ids):
+    pages = _pages(client, "/jobs?limit=2&lat=11.34&lon=77.72&max_distance=12", "jobs")
+    assert [job["job_id"] for page in pages for job in page] == list(reversed(job_ids))[:3]
+
+
+def test_all_jobs_cursor(client, job_ids):
+    pages = _pages(client, "/all_jobs?limit=4", "jobs")
+    assert [job["job_id"] for page in pages for job in page] == job_ids
+
+
+def test_last_page_has_no_cursor(client, job_ids):
+    body = client.get("/jobs?limit=7").get_json()
+    assert len(body["jobs"]) == 7
+    assert body["next_cursor"] is None
+
+
+def test_invalid_cursor(client, job_ids):
+    response = client.get("/jobs?cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}
+
+
+def test_notifications_cursor_newest_first(client, seeker):
+    headers = seeker[1]
+    for index in range(5):
+        response = client.post(
+            "/test-notification", json={"title": f"Notice {index}", "message": "Hello"}, headers=headers
+        )
+        assert response.status_code == 200
+
+    pages = _pages(client, "/notifications?limit=2", "notifications", headers)
+    seen = [notification["notification_id"] for page in pages for notification in page]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert seen == sorted(set(seen), reverse=True)
+    assert len(seen) == 5
+
+
+def test_search_cursor_survives_writes_to_other_jobs(client, provider, job_ids):
+    body = client.get("/filter_jobs?q=harvesting&limit=3").get_json()
+    seen = [job["job_id"] for job in body["jobs"]]
+    # New jobs change the full-text statistics, and with them every rank
+    for index in range(20):
+        other = dict(_job(index), title=f"Milk Collector {index}", required_skills="milking")
+        assert client.post("/jobs", json=other, headers=provider[1]).status_code == 201
+
+    while body["next_cursor"]:
+        body = client.get(f"/filter_jobs?q=harvesting&limit=3&cursor={body['next_cursor']}").get_json()
+        seen += [job["job_id"] for job in body["jobs"]]
+    assert sorted(seen) == sorted(job_ids)
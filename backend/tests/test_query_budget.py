@@ -0,0 +1,49 @@
+"""
+Query budgets for the application routes
+Creating or updating an application, notifications included, runs a fixed
+number of statements with none repeated per row
+"""
+import pytest
+
+from models import db
+from sql_profile import query_budget
+
+
+JOB = {
+    "title": "Milk Collector",
+    "required_skills": "milking, driving",
+    "wage": 600,
+    "work_hours": "morning",
+    "duration": "full-time",
+    "required_education": "none",
+    "latitude": 11.35,
+    "longitude": 77.71,
+}
+
+
+@pytest.fixture
+def job_id(client, provider):
+    response = client.post("/jobs", json=JOB, headers=provider[1])
+    assert response.status_code == 201
+    return response.get_json()["job_id"]
+
+
+def test_create_application_query_budget(app, client, seeker, job_id):
+    with app.app_context(), query_budget(db.engine, 12, max_repeats=1):
+        response = client.post("/applications", json={"job_id": job_id}, headers=seeker[1])
+    assert response.status_code == 201
+    assert response.get_json()["status"] == "applied"
+
+
+def test_update_application_query_budget(app, client, seeker, provider, job_id):
+    application_id = client.post(
+        "/applications", json={"job_id": job_id}, headers=seeker[1]
+    ).get_json()["application_id"]
+
+    # The seeker has email and SMS enabled, so two outbox rows are written
+    with app.app_context(), query_budget(db.engine, 12, max_repeats=1):
+        response = client.patch(
+            f"/applications/{application_id}", json={"status": "interview"}, headers=provider[1]
+        )
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "interview"
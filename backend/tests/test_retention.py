@@ -0,0 +1,93 @@
+"""
+Retention archives expired rows before deleting them
+"""
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import NotificationOutbox, SearchLog, db
+from retention import RetentionManager, RetentionPolicy
+
+
+@pytest.fixture
+def search_logs(plain_app):
+    """Five search logs 40 days old and two from today; returns the old IDs"""
+    now = datetime.utcnow()
+    with plain_app.app_context():
+        old = [
+            SearchLog(seeker_id=1, duration_ms=index, created_at=now - timedelta(days=40, minutes=index))
+            for index in range(5)
+        ]
+        recent = [SearchLog(seeker_id=1, duration_ms=100 + index, created_at=now) for index in range(2)]
+        db.session.add_all(old + recent)
+        db.session.commit()
+        return sorted(log.id for log in old)
+
+
+def _manager(app, archive_dir, policies):
+    return RetentionManager(app, policies, archive_dir=str(archive_dir), batch_size=2, batch_pause=0)
+
+
+def _archived(path):
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        return [json.loads(line) for line in archive]
+
+
+def test_expired_rows_are_archived_then_deleted(plain_app, search_logs, tmp_path):
+    released = []
+    policy = RetentionPolicy(SearchLog, 30, on_delete=released.extend)
+    summary = _manager(plain_app, tmp_path / "archive", [policy]).run()
+
+    assert summary["deleted"] == {"search_log": 5}
+    assert len(summary["archives"]) == 1
+    archived = _archived(summary["archives"][0])
+    assert sorted(row["id"] for row in archived) == search_logs
+    assert sorted(row["id"] for row in released) == search_logs
+    assert all(isinstance(row["created_at"], str) for row in archived)
+    with plain_app.app_context():
+        remaining = [log.duration_ms for log in SearchLog.query.order_by(SearchLog.id)]
+    assert remaining == [100, 101]
+
+
+def test_nothing_expired_writes_no_archive(plain_app, search_logs, tmp_path):
+    policy = RetentionPolicy(SearchLog, 60)
+    summary = _manager(plain_app, tmp_path / "archive", [policy]).run()
+
+    assert summary["deleted"] == {"search_log": 0}
+    assert summary["archives"] == []
+    assert not (tmp_path / "archive").exists()
+
+
+def test_rows_are_kept_when_the_archive_cannot_be_written(plain_app, search_logs, tmp_path):
+    blocked = tmp_path / "archive"
+    blocked.write_text("not a directory")
+    policy = RetentionPolicy(SearchLog, 30)
+
+    with pytest.raises(OSError):
+        _manager(plain_app, blocked, [policy]).run()
+    with plain_app.app_context():
+        assert SearchLog.query.count() == 7
+
+
+def test_conditions_narrow_the_policy(plain_app, tmp_path):
+    old = datetime.utcnow() - timedelta(days=20)
+    with plain_app.app_context():
+        db.session.add_all([
+            NotificationOutbox(
+                notification_id=1, channel="email", recipient="a@example.com", body="Hi",
+                status=status, created_at=old,
+            )
+            for status in ("sent", "failed", "pending")
+        ])
+        db.session.commit()
+    policy = RetentionPolicy(
+        NotificationOutbox, 14, conditions=[NotificationOutbox.status.in_(["sent", "failed"])]
+    )
+    summary = _manager(plain_app, tmp_path / "archive", [policy]).run()
+
+    assert summary["deleted"] == {"notification_outbox": 2}
+    assert sorted(row["status"] for row in _archived(summary["archives"][0])) == ["failed", "sent"]
+    with plain_app.app_context():
+        assert [row.status for row in NotificationOutbox.query] == ["pending"]
@@ -0,0 +1,126 @@
+"""
+Dashboard rollups follow flushes and reconcile against the source tables
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import SESSION_EVENTS
+from models import Application, Feedback, MetricRollup, SearchLog, Seeker, db
+from rollups import DAY, EPOCH, HOUR, TOTAL, MetricsRollup
+
+
+def _seeker(gender="female", pwd=False, latitude=11.34, longitude=77.72):
+    return Seeker(
+        name="Seeker",
+        age=30,
+        gender=gender,
+        pwd_status=pwd,
+        skills="milking",
+        expected_wage=500,
+        work_hours="morning",
+        duration_pref="full-time",
+        education_level="none",
+        latitude=latitude,
+        longitude=longitude,
+    )
+
+
+@pytest.fixture
+def rollup(plain_app):
+    return MetricsRollup(plain_app, cell_size_deg=0.25)
+
+
+@pytest.fixture
+def tracked(plain_app, rollup):
+    """Route the app's session hooks so every flush updates the rollups"""
+    hooks = plain_app.extensions["jobmatch_session_hooks"] = {name: [] for name in SESSION_EVENTS}
+    hooks["after_flush"].append(rollup.track)
+    return rollup
+
+
+def _populate(app):
+    """Two seekers in different cells, two applications and one placement"""
+    with app.app_context():
+        erode = _seeker("female", pwd=True)
+        madurai = _seeker("male", latitude=9.93, longitude=78.12)
+        db.session.add_all([erode, madurai])
+        db.session.flush()
+        first = Application(seeker_id=erode.id, job_id=1, match_score=0.8)
+        second = Application(seeker_id=madurai.id, job_id=1, match_score=0.5)
+        db.session.add_all([first, second])
+        db.session.flush()
+        db.session.add(Feedback(application_id=first.id, completed=True, payment_confirmed=True))
+        db.session.add(SearchLog(seeker_id=erode.id, duration_ms=40))
+        db.session.commit()
+
+
+def _totals(app, rollup):
+    with app.app_context():
+        return rollup.totals()
+
+
+def test_flushes_keep_totals_current(plain_app, tracked):
+    tracked.reconcile()
+    _populate(plain_app)
+
+    totals = _totals(plain_app, tracked)
+    assert totals["seekers"] == 2
+    assert totals["applications"] == 2
+    assert totals["match_score_sum"] == pytest.approx(1.3)
+    assert totals["placements"] == 1
+    assert totals["women_placements"] == 1
+    assert totals["pwd_placements"] == 1
+    # Nothing to correct: every change went through a tracked flush
+    assert tracked.reconcile() == {}
+
+
+def test_reconcile_corrects_drift(plain_app, tracked):
+    tracked.reconcile()
+    _populate(plain_app)
+    with plain_app.app_context():
+        MetricRollup.query.filter_by(period=TOTAL, period_start=EPOCH, region="").update(
+            {"seekers": 10, "placements": 0}
+        )
+        db.session.commit()
+
+    assert tracked.reconcile() == {"seekers": -8, "placements": 1}
+    totals = _totals(plain_app, tracked)
+    assert totals["seekers"] == 2
+    assert totals["placements"] == 1
+
+
+def test_first_reconcile_builds_rollups_from_source_tables(plain_app, rollup):
+    # Written without the flush hook, as on a database that predates the rollups
+    _populate(plain_app)
+
+    drift = rollup.reconcile()
+    assert drift["seekers"] == 2
+    assert drift["searches"] == 1
+    totals = _totals(plain_app, rollup)
+    assert totals["applications"] == 2
+    assert totals["search_ms_sum"] == 40
+
+    now = datetime.utcnow()
+    with plain_app.app_context():
+        daily = rollup.series(DAY, now - timedelta(days=1), now + timedelta(days=1))
+        erode = rollup.series(
+            HOUR, now - timedelta(hours=1), now + timedelta(hours=1), region=rollup.region(11.34, 77.72)
+        )
+    assert sum(bucket["seekers"] for bucket in daily.values()) == 2
+    assert sum(bucket["placements"] for bucket in daily.values()) == 1
+    assert sum(bucket["seekers"] for bucket in erode.values()) == 1
+    assert sum(bucket["searches"] for bucket in erode.values()) == 1
+
+
+def test_deleting_a_placement_is_tracked(plain_app, tracked):
+    tracked.reconcile()
+    _populate(plain_app)
+    with plain_app.app_context():
+        db.session.delete(Feedback.query.one())
+        db.session.commit()
+
+    totals = _totals(plain_app, tracked)
+    assert totals["placements"] == 0
+    assert totals["women_placements"] == 0
+    assert tracked.reconcile() == {}
@@ -0,0 +1,69 @@
+"""
+Per-number SMS pacing
+Twilio is replaced by a fake that records when each message was handed over
+"""
+import time
+
+import pytest
+
+from notifications import SmsDeferred, SmsSender
+
+
+class _FakeMessages:
+    def __init__(self):
+        self.sent = []
+
+    def create(self, body, from_, to):
+        self.sent.append((time.monotonic(), from_, to))
+        return type("Message", (), {"sid": f"SM{len(self.sent)}"})()
+
+
+@pytest.fixture
+def make_sender():
+    senders = []
+
+    def make_sender(numbers, rate_per_second):
+        sender = SmsSender("AC0", "token", numbers, rate_per_second=rate_per_second, max_workers=4)
+        sender.client = type("Client", (), {"messages": _FakeMessages()})()
+        senders.append(sender)
+        return sender
+
+    yield make_sender
+    for sender in senders:
+        sender._executor.shutdown(wait=False)
+
+
+def test_burst_to_one_number_is_paced(make_sender):
+    sender = make_sender(["+15550000001"], rate_per_second=20)
+    started = time.monotonic()
+    assert sender.send_many([("9876543210", f"Message {index}") for index in range(5)]) == [True] * 5
+
+    times = sorted(sent_at for sent_at, _, _ in sender.client.messages.sent)
+    # One token up front, then one every 50 ms
+    assert times[-1] - started >= 4 / 20 - 0.01
+    assert all(later - earlier >= 1 / 20 - 0.01 for earlier, later in zip(times, times[1:]))
+
+
+def test_numbers_are_limited_independently(make_sender):
+    sender = make_sender(["+15550000001", "+15550000002"], rate_per_second=20)
+    started = time.monotonic()
+    sender.send_many([("9876543210", f"Message {index}") for index in range(4)])
+
+    by_number = {}
+    for sent_at, number, _ in sender.client.messages.sent:
+        by_number.setdefault(number, []).append(sent_at - started)
+    assert sorted(len(times) for times in by_number.values()) == [2, 2]
+    # Two messages per number need one wait each, not three
+    assert max(max(times) for times in by_number.values()) < 3 / 20
+
+
+def test_send_defers_instead_of_waiting(make_sender):
+    sender = make_sender(["+15550000001"], rate_per_second=2)
+    assert sender.send("9876543210", "First")
+
+    started = time.monotonic()
+    with pytest.raises(SmsDeferred) as deferred:
+        sender.send("9876543210", "Second")
+    assert time.monotonic() - started < 0.1
+    assert 0 < deferred.value.retry_after <= 0.5
+    assert len(sender.client.messages.sent) == 1
@@ -0,0 +1,41 @@
+"""
+Request SQL profiles recorded by the app's own engine hooks
+"""
+import pytest
+
+
+@pytest.fixture
+def app_config():
+    return {"SQL_PROFILE_HEADER": True, "SQL_REPEAT_THRESHOLD": 3, "METRICS_TOKEN": "scrape-secret"}
+
+
+def _profile(response):
+    fields = dict(part.split("=") for part in response.headers["X-SQL-Profile"].split("; "))
+    return {name: float(value) for name, value in fields.items()}
+
+
+def test_multi_row_insert_is_one_statement(client, seeker, provider):
+    for index in range(6):
+        job = {
+            "title": f"Milker {index}",
+            "required_skills": "milking",
+            "wage": 500,
+            "work_hours": "morning",
+            "duration": "full-time",
+            "required_education": "none",
+            "latitude": 11.34 + index * 0.01,
+            "longitude": 77.72,
+        }
+        assert client.post("/jobs", json=job, headers=provider[1]).status_code == 201
+
+    # Rematerializes the seeker's six match rows in one multi-row INSERT
+    seeker_id = seeker[0]["seeker_id"]
+    response = client.patch(f"/seekers/{seeker_id}", json={"skills": "milking, cleaning"}, headers=seeker[1])
+    assert response.status_code == 200
+    assert _profile(response)["repeated"] == 0
+
+    # /metrics counts the request's statements the same way
+    series = 'jobmatch_http_request_db_queries_sum{method="PATCH",route="/seekers/<int:seeker_id>"}'
+    metrics = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).get_data(as_text=True)
+    recorded = [float(line.split()[-1]) for line in metrics.splitlines() if line.startswith(series)]
+    assert recorded == [_profile(response)["queries"]]
@@ -140,9 +140,22 @@ const NotificationBell = ({ t }) => {
 
   useEffect(() => {
     fetchNotifications();
-    // Poll for new notifications every 30 seconds
-    const interval = setInterval(fetchNotifications, 30000);
-    return () => clearInterval(interval);
+    const token = localStorage.getItem("token");
+    if (!token) return;
+
+    // New notifications and unread counts are pushed by the server;
+    // EventSource reconnects on its own if the stream drops
+    const stream = new EventSource(
+      `http://localhost:5000/notifications/stream?jwt=${encodeURIComponent(token)}`
+    );
+    stream.addEventListener("notification", (event) => {
+      const notification = JSON.parse(event.data);
+      setNotifications((prev) => [notification, ...prev].slice(0, 10));
+    });
+    stream.addEventListener("unread", (event) => {
+      setUnreadCount(JSON.parse(event.data).unread_count || 0);
+    });
+    return () => stream.close();
   }, []);
 
   return (
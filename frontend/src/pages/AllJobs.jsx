@@ -4,13 +4,18 @@ import JobCard from "../components/JobCard";
 
 const AllJobs = ({ t }) => {
   const [jobs, setJobs] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+
+  const loadJobs = async (cursor) => {
+    const response = await axios.get("http://localhost:5000/all_jobs", {
+      params: cursor ? { cursor } : {},
+    });
+    setJobs((prev) => (cursor ? [...prev, ...response.data.jobs] : response.data.jobs));
+    setNextCursor(response.data.next_cursor);
+  };
 
   useEffect(() => {
-    const loadJobs = async () => {
-      const response = await axios.get("http://localhost:5000/all_jobs");
-      setJobs(response.data.jobs);
-    };
-    loadJobs();
+    loadJobs(null);
   }, []);
 
   return (
@@ -21,6 +26,11 @@ const AllJobs = ({ t }) => {
           <JobCard key={job.job_id} job={job} t={t} />
         ))}
       </div>
+      {nextCursor && (
+        <button className="secondary" onClick={() => loadJobs(nextCursor)}>
+          {t("loadMore")}
+        </button>
+      )}
     </div>
   );
 };
@@ -1,12 +1,23 @@
-import React from "react";
+import React, { useState } from "react";
+import axios from "axios";
 import { useLocation, useNavigate } from "react-router-dom";
 import JobCard from "../components/JobCard";
 
 const JobMatches = ({ t }) => {
   const location = useLocation();
   const navigate = useNavigate();
-  const matches = location.state?.matches || [];
+  const [matches, setMatches] = useState(location.state?.matches || []);
+  const [nextOffset, setNextOffset] = useState(location.state?.nextOffset ?? null);
   const seekerLocation = location.state?.seekerLocation;
+  const seekerId = location.state?.seekerId;
+
+  const loadMore = async () => {
+    const response = await axios.get(`http://localhost:5000/match_jobs/${seekerId}`, {
+      params: { offset: nextOffset },
+    });
+    setMatches((prev) => [...prev, ...response.data.matches]);
+    setNextOffset(response.data.next_offset);
+  };
 
   return (
     <div className="page">
@@ -17,6 +28,11 @@ const JobMatches = ({ t }) => {
           <JobCard key={job.job_id} job={job} seekerLocation={seekerLocation} t={t} />
         ))}
       </div>
+      {seekerId && nextOffset != null && (
+        <button className="secondary" onClick={loadMore}>
+          {t("loadMore")}
+        </button>
+      )}
       <button className="secondary" onClick={() => navigate("/seeker")}>
         {t("back")}
       </button>
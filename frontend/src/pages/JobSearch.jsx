@@ -30,6 +30,8 @@ const JobSearch = ({ t }) => {
     pwd_accessible: "",
   });
   const [results, setResults] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [searchParams, setSearchParams] = useState({});
   const [showResults, setShowResults] = useState(false);
   const [userLocation, setUserLocation] = useState(null);
   const [geoError, setGeoError] = useState("");
@@ -112,9 +114,20 @@ const JobSearch = ({ t }) => {
     }
     const response = await axios.get("http://localhost:5000/filter_jobs", { params });
     setResults(response.data.jobs);
+    setNextCursor(response.data.next_cursor);
+    setSearchParams(params);
     setShowResults(true);
   };
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    const response = await axios.get("http://localhost:5000/filter_jobs", {
+      params: { ...searchParams, cursor: nextCursor },
+    });
+    setResults((prev) => [...prev, ...response.data.jobs]);
+    setNextCursor(response.data.next_cursor);
+  };
+
   const handleCloseResults = () => {
     setShowResults(false);
   };
@@ -253,6 +266,11 @@ const JobSearch = ({ t }) => {
           <JobCard key={job.job_id} job={job} t={t} />
         ))}
       </div>
+      {nextCursor && (
+        <button className="secondary" onClick={handleLoadMore}>
+          {t("loadMore")}
+        </button>
+      )}
       {showResults && (
         <div className="modal-overlay" role="dialog" aria-modal="true">
           <div className="modal-card">
@@ -274,6 +292,11 @@ const JobSearch = ({ t }) => {
                 ))}
               </div>
             )}
+            {nextCursor && (
+              <button className="secondary" onClick={handleLoadMore}>
+                {t("loadMore")}
+              </button>
+            )}
           </div>
         </div>
       )}
@@ -124,11 +124,14 @@ const SeekerDashboard = ({ t }) => {
 
   const handleMatch = async () => {
     if (!seekerId) return;
+    // First page only; the matches page loads more on demand
     const response = await axios.get(`http://localhost:5000/match_jobs/${seekerId}`);
     navigate("/matches", { 
       state: { 
         matches: response.data.matches,
-        seekerLocation: response.data.seeker_location
+        seekerLocation: response.data.seeker_location,
+        seekerId,
+        nextOffset: response.data.next_offset,
       } 
     });
   };
@@ -112,6 +112,7 @@ export const translations = {
     roleSeekerDesc: "Find verified jobs near you.",
     roleProviderDesc: "Post jobs and hire locally.",
     allJobsTitle: "All Jobs",
+    loadMore: "Load more",
     sampleNetwork: "Tamil Nadu Rural Employment Network",
     sampleJobFarm: "Farm Assistant",
     sampleJobTextile: "Textile Helper",
@@ -288,6 +289,7 @@ export const translations = {
     roleSeekerDesc: "உங்களுக்கருகில் சரிபார்க்கப்பட்ட வேலைகள்.",
     roleProviderDesc: "வேலைகளை பதிவு செய்து உள்ளூரில் பணியமர்த்துங்கள்.",
     allJobsTitle: "அனைத்து வேலைகள்",
+    loadMore: "மேலும் காட்டு",
     sampleNetwork: "தமிழ்நாடு கிராமப்புற வேலைவாய்ப்பு வலை",
     sampleJobFarm: "விவசாய உதவியாளர்",
     sampleJobTextile: "நெய்தல் உதவியாளர்",
@@ -464,6 +466,7 @@ export const translations = {
     roleSeekerDesc: "अपने आसपास सत्यापित नौकरियाँ खोजें।",
     roleProviderDesc: "नौकरियाँ पोस्ट करें और स्थानीय भर्ती करें।",
     allJobsTitle: "सभी नौकरियाँ",
+    loadMore: "और देखें",
     sampleNetwork: "तमिलनाडु ग्रामीण रोजगार नेटवर्क",
     sampleJobFarm: "कृषि सहायक",
     sampleJobTextile: "वस्त्र सहायक",